@@ -0,0 +1,50 @@
+library ieee;
+use ieee.std_logic_1164.all;
+
+------------------------------------------------------
+-- NAME: clk_mux
+--
+-- DESCRIPTION: Glitch free 2:1 clock mux. sel is synced
+-- into each clock domain on the falling edge and a clock
+-- is only enabled once the other one has been disabled,
+-- so clk_out never gets a short pulse. Both clocks have
+-- to run while switching.
+--
+-- NOTES: Replace with the vendor's clock mux primitive
+-- (e.g. BUFGMUX_CTRL) when the output drives a global
+-- clock network.
+------------------------------------------------------
+
+entity clk_mux is
+    port (
+        clk0        : in std_logic;
+        clk1        : in std_logic;
+        sel         : in std_logic;     -- '0' clk0, '1' clk1
+        clk_out     : out std_logic
+    );
+end entity clk_mux;
+
+architecture rtl of clk_mux is
+    signal en0_meta : std_logic := '1';
+    signal en0      : std_logic := '1';
+    signal en1_meta : std_logic := '0';
+    signal en1      : std_logic := '0';
+begin
+
+    clk_out <= (clk0 and en0) or (clk1 and en1);
+
+    en0_proc : process(clk0) begin
+        if falling_edge(clk0) then
+            en0_meta    <= (not sel) and (not en1);
+            en0         <= en0_meta;
+        end if;
+    end process en0_proc;
+
+    en1_proc : process(clk1) begin
+        if falling_edge(clk1) then
+            en1_meta    <= sel and (not en0);
+            en1         <= en1_meta;
+        end if;
+    end process en1_proc;
+
+end architecture;
\ No newline at end of file
@@ -6,4 +6,9 @@ $(PREFIX)rtl/math_pack.vhd 		\
 $(PREFIX)rtl/async_fifo.vhd 	\
 $(PREFIX)rtl/sync_fifo.vhd 		\
 $(PREFIX)rtl/skid_buffer.vhd 	\
-$(PREFIX)rtl/simple_pipe.vhd
\ No newline at end of file
+$(PREFIX)rtl/simple_pipe.vhd 	\
+$(PREFIX)rtl/clk_mux.vhd
+
+# Library analysis order, needed by simulators that analyse
+# every source up front (nvc)
+VHDL_LIB_ORDER += COMP
@@ -2,12 +2,15 @@ library ieee;
 use ieee.std_logic_1164.all;
 use ieee.numeric_std.all;
 
+library comp;
+
 use work.MAC_pack.all;
 use work.eth_pack.all;
 
 entity MAC_RMII is
     generic (
-        TX_UNFOLD_CNT       : natural := 2);
+        TX_UNFOLD_CNT       : natural := 2;
+        TX_TS_FIFO_DEPTH    : natural := 16);
     port (
         clk                     : in std_logic;
         rst                     : in std_logic;
@@ -19,6 +22,7 @@ entity MAC_RMII is
         rx_m_axis_tvalid        : out std_logic;
         rx_m_axis_tready        : in std_logic;
         rx_m_axis_tlast         : out std_logic;
+        rx_m_axis_tuser         : out std_logic_vector(TIMESTAMP_WIDTH - 1 downto 0);
         ---------------------------------------
         -- AXI TX Data Stream 
         ---------------------------------------
@@ -28,6 +32,18 @@ entity MAC_RMII is
         tx_s_axis_tready        : out std_logic;
         tx_s_axis_tlast         : in std_logic;
         ---------------------------------------
+        -- Timestamps
+        ---------------------------------------
+        timestamp_out           : out std_logic_vector(TIMESTAMP_WIDTH - 1 downto 0);
+        -- TX timestamp FIFO, one entry per transmitted frame
+        tx_ts_data              : out std_logic_vector(TIMESTAMP_WIDTH - 1 downto 0);
+        tx_ts_empty             : out std_logic;
+        tx_ts_rd_en             : in std_logic := '0';
+        ---------------------------------------
+        -- Loopback mode (LOOPBACK_* in MAC_pack)
+        ---------------------------------------
+        loopback_mode           : in std_logic_vector(LOOPBACK_WIDTH - 1 downto 0) := LOOPBACK_NONE;
+        ---------------------------------------
         -- RMII PHY interface
         ---------------------------------------
         rmii_clk                : in std_logic;
@@ -54,7 +70,65 @@ architecture rtl of MAC_RMII is
     signal tx_pipe_axis_tvalid  : std_logic;
     signal tx_pipe_axis_tready  : std_logic;
 
+    signal phy_tx_busy          : std_logic;
+    signal phy_rx_done          : std_logic;
+
+    signal phy_rx_axis_tdata    : std_logic_vector(MAC_AXIS_DATA_WIDTH - 1 downto 0);
+    signal phy_rx_axis_tvalid   : std_logic;
+    signal phy_rx_axis_tready   : std_logic;
+
+    signal phy_tx_axis_tvalid   : std_logic;
+    signal phy_tx_axis_tready   : std_logic;
+
+    ---------------------------
+    -- Loopback signals
+    ---------------------------
+    signal mac_loopback         : std_logic;
+    signal phy_loopback         : std_logic;
+
+    signal lb_tx_busy           : std_logic;
+    signal lb_rx_done           : std_logic;
+
+    signal lb_s_axis_tvalid     : std_logic;
+    signal lb_s_axis_tready     : std_logic;
+
+    signal lb_m_axis_tdata      : std_logic_vector(MAC_AXIS_DATA_WIDTH - 1 downto 0);
+    signal lb_m_axis_tvalid     : std_logic;
+
+    signal phy_tx_en            : std_logic;
+    signal phy_tx_data          : std_logic_vector(1 downto 0);
+    signal phy_rx_data          : std_logic_vector(1 downto 0);
+    signal phy_crs_dv           : std_logic;
+    signal phy_rx_er            : std_logic;
+    signal loop_crs_dv          : std_logic := '0';
+    signal loop_rx_data         : std_logic_vector(1 downto 0) := (others => '0');
+
+    ---------------------------
+    -- Timestamp signals
+    ---------------------------
+    signal timestamp_cnt        : unsigned(TIMESTAMP_WIDTH - 1 downto 0) := (others => '0');
+    signal timestamp            : std_logic_vector(TIMESTAMP_WIDTH - 1 downto 0);
+    signal tx_timestamp         : std_logic_vector(TIMESTAMP_WIDTH - 1 downto 0);
+    signal tx_timestamp_valid   : std_logic;
+
 begin
+    ------------------------------------------------------------------
+    -- Free running timestamp, counts clk cycles
+    ------------------------------------------------------------------
+    proc_timestamp : process(clk)
+    begin
+        if rising_edge(clk) then
+            if (rst = '1') then
+                timestamp_cnt <= (others => '0');
+            else
+                timestamp_cnt <= timestamp_cnt + 1;
+            end if;
+        end if;
+    end process proc_timestamp;
+
+    timestamp       <= std_logic_vector(timestamp_cnt);
+    timestamp_out   <= timestamp;
+
     ------------------------------------------------------------------
     -- RX pipeline
     ------------------------------------------------------------------
@@ -63,6 +137,7 @@ begin
         clk             => clk,
         rst             => rst,
         rx_done_in      => rx_done,
+        timestamp_in    => timestamp,
         -- Data in from PHY
         s_axis_tdata    => rx_pipe_axis_tdata,
         s_axis_tvalid   => rx_pipe_axis_tvalid,
@@ -72,7 +147,8 @@ begin
         m_axis_tstrb    => rx_m_axis_tstrb,
         m_axis_tvalid   => rx_m_axis_tvalid,
         m_axis_tready   => rx_m_axis_tready,
-        m_axis_tlast    => rx_m_axis_tlast
+        m_axis_tlast    => rx_m_axis_tlast,
+        m_axis_tuser    => rx_m_axis_tuser
     );
 
     ------------------------------------------------------------------
@@ -104,23 +180,100 @@ begin
     port map (
         sys_clk         => clk,
         sys_rst         => rst,
-        tx_busy         => tx_busy,
-        rx_done         => rx_done,
+        tx_busy         => phy_tx_busy,
+        rx_done         => phy_rx_done,
+        -- TX timestamps
+        timestamp_in        => timestamp,
+        tx_timestamp_out    => tx_timestamp,
+        tx_timestamp_valid  => tx_timestamp_valid,
         -- AXI Stream Slave
         s_axis_tdata    => tx_pipe_axis_tdata,
-        s_axis_tvalid   => tx_pipe_axis_tvalid,
-        s_axis_tready   => tx_pipe_axis_tready,
+        s_axis_tvalid   => phy_tx_axis_tvalid,
+        s_axis_tready   => phy_tx_axis_tready,
         -- AXI Stream Master
-        m_axis_tdata    => rx_pipe_axis_tdata,
-        m_axis_tvalid   => rx_pipe_axis_tvalid,
-        m_axis_tready   => rx_pipe_axis_tready,
+        m_axis_tdata    => phy_rx_axis_tdata,
+        m_axis_tvalid   => phy_rx_axis_tvalid,
+        m_axis_tready   => phy_rx_axis_tready,
         -- PHY signals 
         ref_clk_50mhz   => rmii_clk,
-        tx_en           => rmii_tx_en,
-        tx_data         => rmii_tx_data,
-        rx_data         => rmii_rx_data,
-        crs_dv          => rmii_crs_dv,
-        rx_er           => rmii_rx_er
+        tx_en           => phy_tx_en,
+        tx_data         => phy_tx_data,
+        rx_data         => phy_rx_data,
+        crs_dv          => phy_crs_dv,
+        rx_er           => phy_rx_er
+    );
+
+    ------------------------------------------------------------------
+    -- PHY loopback, the TX dibits are registered and fed back into
+    -- the RX side. Nothing is sent to the PHY.
+    ------------------------------------------------------------------
+    proc_phy_loopback : process(rmii_clk)
+    begin
+        if rising_edge(rmii_clk) then
+            loop_crs_dv     <= phy_tx_en;
+            loop_rx_data    <= phy_tx_data;
+        end if;
+    end process proc_phy_loopback;
+
+    phy_crs_dv  <= loop_crs_dv when (phy_loopback = '1') else rmii_crs_dv;
+    phy_rx_er   <= '0' when (phy_loopback = '1') else rmii_rx_er;
+    phy_rx_data <= loop_rx_data when (phy_loopback = '1') else rmii_rx_data;
+
+    -- Idle towards the PHY while looped back
+    rmii_tx_en      <= phy_tx_en and (not phy_loopback);
+    rmii_tx_data    <= phy_tx_data when (phy_loopback = '0') else (others => '0');
+
+    ------------------------------------------------------------------
+    -- MAC loopback, the TX pipeline output goes straight to the RX
+    -- pipeline. The PHY interface doesn't send anything and what it
+    -- receives is dropped.
+    ------------------------------------------------------------------
+    mac_loopback <= '1' when (loopback_mode = LOOPBACK_MAC) else '0';
+    phy_loopback <= '1' when (loopback_mode = LOOPBACK_PHY) else '0';
+
+    MAC_loopback_inst : entity work.MAC_loopback(rtl)
+    port map (
+        clk             => clk,
+        rst             => rst,
+        tx_busy         => lb_tx_busy,
+        rx_done         => lb_rx_done,
+        -- From TX pipeline
+        s_axis_tdata    => tx_pipe_axis_tdata,
+        s_axis_tvalid   => lb_s_axis_tvalid,
+        s_axis_tready   => lb_s_axis_tready,
+        -- To RX pipeline
+        m_axis_tdata    => lb_m_axis_tdata,
+        m_axis_tvalid   => lb_m_axis_tvalid,
+        m_axis_tready   => rx_pipe_axis_tready
+    );
+
+    lb_s_axis_tvalid    <= tx_pipe_axis_tvalid and mac_loopback;
+    phy_tx_axis_tvalid  <= tx_pipe_axis_tvalid and (not mac_loopback);
+    tx_pipe_axis_tready <= lb_s_axis_tready when (mac_loopback = '1') else phy_tx_axis_tready;
+
+    rx_pipe_axis_tdata  <= lb_m_axis_tdata when (mac_loopback = '1') else phy_rx_axis_tdata;
+    rx_pipe_axis_tvalid <= lb_m_axis_tvalid when (mac_loopback = '1') else phy_rx_axis_tvalid;
+    phy_rx_axis_tready  <= '1' when (mac_loopback = '1') else rx_pipe_axis_tready;
+
+    tx_busy <= lb_tx_busy when (mac_loopback = '1') else phy_tx_busy;
+    rx_done <= lb_rx_done when (mac_loopback = '1') else phy_rx_done;
+
+    ------------------------------------------------------------------
+    -- TX timestamps, dropped when the FIFO is full
+    ------------------------------------------------------------------
+    tx_ts_fifo : entity comp.sync_fifo(rtl)
+    generic map (
+        DATA_WIDTH  => TIMESTAMP_WIDTH,
+        DEPTH       => TX_TS_FIFO_DEPTH
+    ) port map (
+        clk     => clk,
+        rst     => rst,
+        wr_data => tx_timestamp,
+        wr_en   => tx_timestamp_valid,
+        full    => open,
+        rd_data => tx_ts_data,
+        rd_en   => tx_ts_rd_en,
+        empty   => tx_ts_empty
     );
 
 end architecture rtl;
\ No newline at end of file
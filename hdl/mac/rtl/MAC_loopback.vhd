@@ -0,0 +1,91 @@
+library ieee;
+use ieee.std_logic_1164.all;
+use ieee.numeric_std.all;
+
+library comp;
+use comp.math_pack.all;
+
+library mac;
+use mac.MAC_pack.all;
+use mac.eth_pack.all;
+
+------------------------------------------------------
+-- NAME: MAC_loopback
+--
+-- DESCRIPTION: Stands in for the PHY interface when
+-- the MAC is looped back in the sys clk domain. The
+-- TX pipeline output is passed straight to the RX
+-- pipeline input, one byte per clk cycle. tx_busy and
+-- rx_done are driven the way the PHY interfaces do:
+-- a frame ends once no byte came for TIMEOUT_MAX
+-- cycles and tx_busy drops INTER_PKT_GAP_SIZE cycles
+-- after that.
+------------------------------------------------------
+
+entity MAC_loopback is
+    port (
+        clk             : in std_logic;
+        rst             : in std_logic;
+        tx_busy         : out std_logic := '0';
+        rx_done         : out std_logic := '0';
+        -- From TX pipeline
+        s_axis_tdata    : in std_logic_vector(MAC_AXIS_DATA_WIDTH - 1 downto 0);
+        s_axis_tvalid   : in std_logic;
+        s_axis_tready   : out std_logic;
+        -- To RX pipeline
+        m_axis_tdata    : out std_logic_vector(MAC_AXIS_DATA_WIDTH - 1 downto 0);
+        m_axis_tvalid   : out std_logic;
+        m_axis_tready   : in std_logic
+    );
+end entity MAC_loopback;
+
+architecture rtl of MAC_loopback is
+    constant TIMEOUT_MAX : natural := 8;
+
+    signal pkt_timeout  : unsigned(clog2(TIMEOUT_MAX) - 1 downto 0) := (others => '0');
+    signal gap_cnt      : unsigned(clog2(INTER_PKT_GAP_SIZE) downto 0) := (others => '0');
+    signal active_pkt   : std_logic := '0';
+    signal busy         : std_logic := '0';
+
+begin
+
+    m_axis_tdata    <= s_axis_tdata;
+    m_axis_tvalid   <= s_axis_tvalid;
+    s_axis_tready   <= m_axis_tready;
+
+    tx_busy <= busy;
+
+    loopback_proc : process(clk)
+    begin
+        if rising_edge(clk) then
+            if (rst = '1') then
+                active_pkt  <= '0';
+                busy        <= '0';
+                rx_done     <= '0';
+                pkt_timeout <= (others => '0');
+                gap_cnt     <= (others => '0');
+            elsif (s_axis_tvalid = '1') then
+                -- Frame in progress
+                active_pkt  <= '1';
+                busy        <= '1';
+                rx_done     <= '0';
+                pkt_timeout <= (others => '0');
+                gap_cnt     <= (others => '0');
+            elsif (active_pkt = '1') then
+                if (pkt_timeout = TIMEOUT_MAX - 1) then
+                    active_pkt  <= '0';
+                    rx_done     <= '1';
+                else
+                    pkt_timeout <= pkt_timeout + 1;
+                end if;
+            elsif (busy = '1') then
+                if (gap_cnt = INTER_PKT_GAP_SIZE - 1) then
+                    busy <= '0';
+                else
+                    gap_cnt <= gap_cnt + 1;
+                end if;
+            end if;
+        end if;
+    end process loopback_proc;
+
+end architecture rtl;
@@ -7,9 +7,22 @@ package MAC_pack is
     constant MAC_AXIS_DATA_WIDTH : natural := 8;
     constant MAC_AXIS_STRB_WIDTH : natural := MAC_AXIS_DATA_WIDTH / 8;
 
+    -- Frame timestamps, free running count of sys clk cycles
+    constant TIMESTAMP_WIDTH : natural := 32;
+
+    -- Loopback modes
+    constant LOOPBACK_WIDTH : natural := 2;
+    constant LOOPBACK_NONE  : std_logic_vector(LOOPBACK_WIDTH - 1 downto 0) := "00";
+    -- TX pipeline output to RX pipeline input, in the sys clk domain
+    constant LOOPBACK_MAC   : std_logic_vector(LOOPBACK_WIDTH - 1 downto 0) := "01";
+    -- PHY interface TX pins to its RX pins, in the PHY clock domain
+    constant LOOPBACK_PHY   : std_logic_vector(LOOPBACK_WIDTH - 1 downto 0) := "10";
+
     type t_axis_data_array is array (natural range<>) of std_logic_vector(MAC_AXIS_DATA_WIDTH - 1 downto 0);
     type t_axis_strb_array is array (natural range<>) of std_logic_vector(MAC_AXIS_STRB_WIDTH - 1 downto 0);
 
+    type t_natural_array is array (natural range<>) of natural;
+
 end package MAC_pack;
 
 package body MAC_pack is
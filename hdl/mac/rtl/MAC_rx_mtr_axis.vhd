@@ -11,6 +11,7 @@ entity MAC_rx_mtr_axis is
         clk                 : in std_logic;
         trans_packet_in     : in std_logic;
         pkt_length_in       : in unsigned(LENGTH_WIDTH - 1 downto 0);
+        pkt_timestamp_in    : in std_logic_vector(TIMESTAMP_WIDTH - 1 downto 0);
         -- AXI Stream Slave
         s_axis_tdata        : in std_logic_vector(MAC_AXIS_DATA_WIDTH - 1 downto 0);
         s_axis_tvalid       : in std_logic;
@@ -20,7 +21,9 @@ entity MAC_rx_mtr_axis is
         m_axis_tstrb        : out std_logic_vector(MAC_AXIS_STRB_WIDTH - 1 downto 0);
         m_axis_tvalid       : out std_logic;
         m_axis_tready       : in std_logic;
-        m_axis_tlast        : out std_logic
+        m_axis_tlast        : out std_logic;
+        -- RX timestamp of the frame, valid with every beat
+        m_axis_tuser        : out std_logic_vector(TIMESTAMP_WIDTH - 1 downto 0) := (others => '0')
     );
 end entity MAC_rx_mtr_axis;
 
@@ -47,6 +50,7 @@ begin
                     if (trans_packet_in = '1') then
                         bytes_sent <= (others => '0');
                         pkt_length <= pkt_length_in;
+                        m_axis_tuser <= pkt_timestamp_in;
                         axis_state <= STREAM;
                     end if;
                 when STREAM =>
@@ -13,6 +13,7 @@ entity MAC_rx_pipeline is
         clk                 : in std_logic;
         rst                 : in std_logic;
         rx_done_in          : in std_logic;
+        timestamp_in        : in std_logic_vector(TIMESTAMP_WIDTH - 1 downto 0);
         -- AXI Stream Slave
         s_axis_tdata        : in std_logic_vector(MAC_AXIS_DATA_WIDTH - 1 downto 0);
         s_axis_tvalid       : in std_logic;
@@ -22,7 +23,9 @@ entity MAC_rx_pipeline is
         m_axis_tstrb        : out std_logic_vector(MAC_AXIS_STRB_WIDTH - 1 downto 0);
         m_axis_tvalid       : out std_logic;
         m_axis_tready       : in std_logic;
-        m_axis_tlast        : out std_logic
+        m_axis_tlast        : out std_logic;
+        -- RX timestamp (SFD detection) of the frame
+        m_axis_tuser        : out std_logic_vector(TIMESTAMP_WIDTH - 1 downto 0)
     );
 end entity MAC_rx_pipeline;
 
@@ -38,6 +41,9 @@ architecture rtl of MAC_rx_pipeline is
     signal frame_length     : unsigned(LENGTH_WIDTH - 1 downto 0);
     signal frame_length_reg : unsigned(LENGTH_WIDTH - 1 downto 0);
 
+    signal frame_timestamp      : std_logic_vector(TIMESTAMP_WIDTH - 1 downto 0);
+    signal frame_timestamp_reg  : std_logic_vector(TIMESTAMP_WIDTH - 1 downto 0);
+
     signal frame_start  : std_logic;
     signal frame_done   : std_logic;
     signal fcs_passed   : std_logic;
@@ -60,7 +66,9 @@ begin
     port map (
         clk                 => clk,
         rx_done_in          => rx_done_in,
+        timestamp_in        => timestamp_in,
         frame_start_out     => frame_start,
+        frame_timestamp_out => frame_timestamp,
         frame_length_out    => frame_length,
         frame_done_out      => frame_done,
         -- AXI Stream Slave
@@ -95,6 +103,7 @@ begin
         if rising_edge(clk) then
             if (frame_done = '1') then
                 frame_length_reg <= frame_length;
+                frame_timestamp_reg <= frame_timestamp;
             end if;
         end if;
     end process cap_frame_length_proc;
@@ -141,6 +150,7 @@ begin
         clk                 => clk,
         trans_packet_in     => fcs_passed,
         pkt_length_in       => frame_length_reg,
+        pkt_timestamp_in    => frame_timestamp_reg,
         -- AXI Stream Slave
         s_axis_tdata        => pkt_buffer_axis_tdata,
         s_axis_tvalid       => pkt_buffer_axis_tvalid,
@@ -150,7 +160,8 @@ begin
         m_axis_tstrb        => m_axis_tstrb,
         m_axis_tvalid       => m_axis_tvalid,
         m_axis_tready       => m_axis_tready,
-        m_axis_tlast        => m_axis_tlast
+        m_axis_tlast        => m_axis_tlast,
+        m_axis_tuser        => m_axis_tuser
     );
 
 end architecture rtl;
\ No newline at end of file
@@ -0,0 +1,202 @@
+library ieee;
+use ieee.std_logic_1164.all;
+use ieee.numeric_std.all;
+
+library mac;
+use mac.MAC_pack.all;
+use mac.eth_pack.all;
+
+------------------------------------------------------
+-- NAME: MAC_tx_arbiter
+--
+-- DESCRIPTION: Merges QUEUE_CNT AXI streams of frames
+-- into the TX stream of the MAC. A queue is picked at
+-- frame boundaries, once the MAC can take the next
+-- frame, so a frame never waits behind one that was
+-- picked while the frame builder pipes were all busy.
+--
+-- ARBITER = "STRICT": The queue with the highest index
+-- that has a frame goes first.
+-- ARBITER = "WRR": Weighted round robin, queue i sends
+-- up to WRR_WEIGHTS(i) frames in a row while the others
+-- have frames waiting. Weights must be at least 1 and
+-- are repeated when there are fewer than QUEUE_CNT.
+--
+-- With vlan_en set an 802.1Q tag is inserted after the
+-- source MAC of every frame, with vlan_vid and the PCP
+-- of the frame's queue (queue_pcp).
+------------------------------------------------------
+
+entity MAC_tx_arbiter is
+    generic (
+        QUEUE_CNT       : natural := 2;
+        ARBITER         : string := "STRICT";
+        WRR_WEIGHTS     : t_natural_array := (0 => 1)
+    );
+    port (
+        clk             : in std_logic;
+        rst             : in std_logic;
+        -- 802.1Q tag insertion
+        vlan_en         : in std_logic := '0';
+        vlan_vid        : in std_logic_vector(VID_WIDTH - 1 downto 0) := (others => '0');
+        queue_pcp       : in std_logic_vector(QUEUE_CNT * PCP_WIDTH - 1 downto 0) := (others => '0');
+        -- AXI Data Stream Slaves, queue i at bits i * MAC_AXIS_DATA_WIDTH
+        s_axis_tdata    : in std_logic_vector(QUEUE_CNT * MAC_AXIS_DATA_WIDTH - 1 downto 0);
+        s_axis_tvalid   : in std_logic_vector(QUEUE_CNT - 1 downto 0);
+        s_axis_tready   : out std_logic_vector(QUEUE_CNT - 1 downto 0);
+        s_axis_tlast    : in std_logic_vector(QUEUE_CNT - 1 downto 0);
+        -- AXI Data Stream Master
+        m_axis_tdata    : out std_logic_vector(MAC_AXIS_DATA_WIDTH - 1 downto 0);
+        m_axis_tstrb    : out std_logic_vector(MAC_AXIS_STRB_WIDTH - 1 downto 0);
+        m_axis_tvalid   : out std_logic;
+        m_axis_tready   : in std_logic;
+        m_axis_tlast    : out std_logic
+    );
+end entity MAC_tx_arbiter;
+
+architecture rtl of MAC_tx_arbiter is
+    -- Bytes before the tag, the frames have no preamble yet
+    constant TAG_POS : natural := TAG_OFFSET - MAC_DST_OFFSET;
+
+    -- Largest WRR weight, checks all of them are at least 1
+    function max_weight return natural is
+        variable w : natural := 1;
+    begin
+        for i in WRR_WEIGHTS'range loop
+            assert (WRR_WEIGHTS(i) >= 1)
+                report "MAC_tx_arbiter: WRR_WEIGHTS must be at least 1"
+                severity failure;
+            if (WRR_WEIGHTS(i) > w) then
+                w := WRR_WEIGHTS(i);
+            end if;
+        end loop;
+        return w;
+    end function max_weight;
+
+    constant MAX_WEIGHT : natural := max_weight;
+
+    type t_arb_fsm is (IDLE, PASS, TAG);
+    signal arb_state : t_arb_fsm := IDLE;
+
+    signal grant        : natural range 0 to QUEUE_CNT - 1 := 0;
+    signal rr_ptr       : natural range 0 to QUEUE_CNT - 1 := 0;
+    signal credit       : natural range 0 to MAX_WEIGHT - 1 := 0;
+
+    signal byte_cnt     : natural range 0 to TAG_POS := 0;
+    signal tag_pending  : std_logic := '0';
+    signal tag_sr       : std_logic_vector(TAG_WIDTH - 1 downto 0) := (others => '0');
+    signal tag_cnt      : natural range 0 to TAG_SIZE - 1 := 0;
+
+    function weight(i : natural) return natural is
+    begin
+        return WRR_WEIGHTS(WRR_WEIGHTS'low + (i mod WRR_WEIGHTS'length));
+    end function weight;
+
+begin
+
+    -------------------------------------------------------------
+    -- Route AXI signals of the granted queue
+    -------------------------------------------------------------
+    m_axis_tstrb    <= (others => '1');
+    m_axis_tdata    <= tag_sr(TAG_WIDTH - 1 downto TAG_WIDTH - MAC_AXIS_DATA_WIDTH) when (arb_state = TAG) else
+                       s_axis_tdata((grant + 1) * MAC_AXIS_DATA_WIDTH - 1 downto grant * MAC_AXIS_DATA_WIDTH);
+    m_axis_tvalid   <= '1' when (arb_state = TAG) else
+                       s_axis_tvalid(grant) when (arb_state = PASS) else '0';
+    m_axis_tlast    <= s_axis_tlast(grant) when (arb_state = PASS) else '0';
+
+    s_tready_proc : process(grant, m_axis_tready, arb_state) begin
+        for i in 0 to QUEUE_CNT - 1 loop
+            s_axis_tready(i) <= '0';
+            if (i = grant and arb_state = PASS) then
+                s_axis_tready(i) <= m_axis_tready;
+            end if;
+        end loop;
+    end process s_tready_proc;
+
+    -------------------------------------------------------------
+    -- Arbiter FSM
+    -------------------------------------------------------------
+    arb_proc : process(clk)
+        variable sel    : natural range 0 to QUEUE_CNT - 1;
+        variable idx    : natural range 0 to QUEUE_CNT - 1;
+        variable found  : boolean;
+    begin
+        if rising_edge(clk) then
+            if (rst /= '0') then
+                arb_state   <= IDLE;
+                rr_ptr      <= 0;
+                credit      <= 0;
+            else
+                case arb_state is
+                    -- Pick the next frame once the MAC can take it
+                    when IDLE =>
+                        sel     := 0;
+                        found   := false;
+                        if (m_axis_tready = '1') then
+                            if (ARBITER = "WRR") then
+                                if (s_axis_tvalid(rr_ptr) = '1' and credit /= 0) then
+                                    -- Current queue has frames left in its turn
+                                    sel     := rr_ptr;
+                                    found   := true;
+                                    credit  <= credit - 1;
+                                else
+                                    for k in 1 to QUEUE_CNT loop
+                                        idx := (rr_ptr + k) mod QUEUE_CNT;
+                                        if (not found and s_axis_tvalid(idx) = '1') then
+                                            sel     := idx;
+                                            found   := true;
+                                        end if;
+                                    end loop;
+                                    if (found) then
+                                        rr_ptr  <= sel;
+                                        credit  <= weight(sel) - 1;
+                                    end if;
+                                end if;
+                            else
+                                for i in 0 to QUEUE_CNT - 1 loop
+                                    if (s_axis_tvalid(i) = '1') then
+                                        sel     := i;
+                                        found   := true;
+                                    end if;
+                                end loop;
+                            end if;
+                        end if;
+                        if (found) then
+                            grant       <= sel;
+                            byte_cnt    <= 0;
+                            tag_pending <= vlan_en;
+                            tag_sr      <= TAG_TPID & queue_pcp((sel + 1) * PCP_WIDTH - 1 downto sel * PCP_WIDTH) & '0' & vlan_vid;
+                            arb_state   <= PASS;
+                        end if;
+                    -- Pass the frame through, stop for the tag after the source MAC
+                    when PASS =>
+                        if (s_axis_tvalid(grant) = '1' and m_axis_tready = '1') then
+                            if (s_axis_tlast(grant) = '1') then
+                                arb_state <= IDLE;
+                            elsif (byte_cnt = TAG_POS - 1 and tag_pending = '1') then
+                                tag_pending <= '0';
+                                tag_cnt     <= 0;
+                                arb_state   <= TAG;
+                            end if;
+                            if (byte_cnt /= TAG_POS) then
+                                byte_cnt <= byte_cnt + 1;
+                            end if;
+                        end if;
+                    -- Insert the 802.1Q tag
+                    when TAG =>
+                        if (m_axis_tready = '1') then
+                            tag_sr <= tag_sr(TAG_WIDTH - MAC_AXIS_DATA_WIDTH - 1 downto 0) & tag_sr(TAG_WIDTH - 1 downto TAG_WIDTH - MAC_AXIS_DATA_WIDTH);
+                            if (tag_cnt = TAG_SIZE - 1) then
+                                arb_state <= PASS;
+                            else
+                                tag_cnt <= tag_cnt + 1;
+                            end if;
+                        end if;
+                    when others =>
+                        arb_state <= IDLE;
+                end case;
+            end if;
+        end if;
+    end process arb_proc;
+
+end architecture rtl;
\ No newline at end of file
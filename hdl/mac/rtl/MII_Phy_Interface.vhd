@@ -30,6 +30,10 @@ entity MII_Phy_Interface is
         sys_rst         : in std_logic := '0';
         tx_busy         : out std_logic := '0';
         rx_done         : out std_logic := '0';
+        -- Timestamp of the first preamble byte of each TX frame
+        timestamp_in        : in std_logic_vector(TIMESTAMP_WIDTH - 1 downto 0) := (others => '0');
+        tx_timestamp_out    : out std_logic_vector(TIMESTAMP_WIDTH - 1 downto 0) := (others => '0');
+        tx_timestamp_valid  : out std_logic := '0';
         -- Tx Data in
         s_axis_tdata    : in std_logic_vector(MAC_AXIS_DATA_WIDTH - 1 downto 0);
         s_axis_tvalid   : in std_logic;
@@ -89,8 +93,13 @@ architecture rtl of MII_Phy_Interface is
     type tx_fsm_t is (WAIT_FOR_PKT, FIRST_NIBBLE, SECOND_NIBBLE, INTER_PKT_GAP);
     signal tx_fsm               : tx_fsm_t := WAIT_FOR_PKT;
     signal phy_clk_tx_busy      : std_logic := '0';
+    signal phy_clk_tx_sof       : std_logic := '0';
     signal tx_inter_pkt_gap_cnt : unsigned(clog2(INTER_PKT_GAP_CYCLES) downto 0) := (others => '0');
 
+    -- TX timestamp signals
+    signal tx_sof       : std_logic;
+    signal tx_sof_buff  : std_logic := '0';
+
 begin
     -------------------------------------------------------------------------------------------
     --                                      MII RX                                           --
@@ -220,6 +229,8 @@ begin
                     if phy_tx_fifo_ne = '1' then
                         -- Packet is available
                         tx_fsm <= FIRST_NIBBLE;
+                        -- Start of frame, the first preamble nibble goes out next
+                        phy_clk_tx_sof <= not phy_clk_tx_sof;
                     end if;
                 when FIRST_NIBBLE =>
                     if phy_tx_fifo_ne = '0' then
@@ -260,4 +271,32 @@ begin
         pipe_out(0) => tx_busy
     );
 
+    -------------------------------------------------------
+    -- Timestamp the start of each TX frame. The phy clock
+    -- toggle is synced to the sys clk domain, so the time
+    -- is 2 - 3 sys clk cycles after the first preamble
+    -- byte left the interface.
+    -------------------------------------------------------
+    sync_tx_sof : entity comp.simple_pipe(rtl)
+    generic map (
+        PIPE_WIDTH  => 1,
+        DEPTH       => 2
+    ) port map (
+        clk         => sys_clk,
+        pipe_in(0)  => phy_clk_tx_sof,
+        pipe_out(0) => tx_sof
+    );
+
+    proc_tx_timestamp : process(sys_clk)
+    begin
+        if rising_edge(sys_clk) then
+            tx_sof_buff         <= tx_sof;
+            tx_timestamp_valid  <= '0';
+            if ((tx_sof xor tx_sof_buff) = '1') then
+                tx_timestamp_out    <= timestamp_in;
+                tx_timestamp_valid  <= '1';
+            end if;
+        end if;
+    end process proc_tx_timestamp;
+
 end architecture rtl;
\ No newline at end of file
@@ -24,7 +24,8 @@ package eth_pack is
     constant SFD_OFFSET             : natural := PREAMBLE_OFFSET + PREAMBLE_SIZE;
     constant MAC_DST_OFFSET         : natural := SFD_OFFSET + SFD_SIZE;
     constant MAC_SRC_OFFSET         : natural := MAC_DST_OFFSET + MAC_DST_SIZE;
-    --constant TAG_OFFSET             : natural := MAC_SRC_OFFSET + MAC_SRC_SIZE;  <--- Is this thing used???
+    -- Offset of the 802.1Q tag in a tagged frame, the fields after it move by TAG_SIZE
+    constant TAG_OFFSET             : natural := MAC_SRC_OFFSET + MAC_SRC_SIZE;
     constant LENGTH_OFFSET          : natural := MAC_SRC_OFFSET + MAC_SRC_SIZE;
     constant FCS_OFFSET             : natural := LENGTH_OFFSET + LENGTH_SIZE;
     constant INTER_PKT_GAME_OFFSET  : natural := FCS_OFFSET + FCS_SIZE; 
@@ -46,6 +47,11 @@ package eth_pack is
 
     constant MIN_FRAME_SIZE : natural := 46;
 
+    -- 802.1Q tag, TPID followed by the TCI (PCP, DEI, VID)
+    constant TAG_TPID       : std_logic_vector(15 downto 0) := X"8100";
+    constant PCP_WIDTH      : natural := 3;
+    constant VID_WIDTH      : natural := 12;
+
     constant LAYER2_FIELDS_SIZE : natural := MAC_DST_SIZE + MAC_SRC_SIZE + LENGTH_SIZE + FCS_SIZE;
     constant CRC32_POLY : std_logic_vector(31 downto 0) := X"04c11db7";
 
@@ -13,7 +13,9 @@ entity l1_eth_frame_decoder is
     port (
         clk                 : in std_logic;
         rx_done_in          : in std_logic;
+        timestamp_in        : in std_logic_vector(TIMESTAMP_WIDTH - 1 downto 0);
         frame_start_out     : out std_logic;
+        frame_timestamp_out : out std_logic_vector(TIMESTAMP_WIDTH - 1 downto 0);
         frame_length_out    : out unsigned(LENGTH_WIDTH - 1 downto 0);
         frame_done_out      : out std_logic;
         -- AXI Stream Slave
@@ -62,6 +64,8 @@ begin
                         frame_start_seq <= (others => '0');
                         axis_ready_reg  <= '0';
                         frame_start_out <= '1';
+                        -- Time the SFD was detected
+                        frame_timestamp_out <= timestamp_in;
                         byte_cnt        <= (others => '0');
                         decode_state    <= GET_LENGTH;
                     elsif (data_valid = '1') then
@@ -13,7 +13,13 @@ $(PREFIX)rtl/tx_crc_pipe.vhd 			\
 $(PREFIX)rtl/frame_builder_pipe.vhd 	\
 $(PREFIX)rtl/MII_Phy_Interface.vhd 		\
 $(PREFIX)rtl/RMII_Phy_Interface.vhd 	\
+$(PREFIX)rtl/MAC_loopback.vhd 			\
 $(PREFIX)rtl/MAC_rx_pipeline.vhd 		\
 $(PREFIX)rtl/MAC_tx_pipeline.vhd 		\
+$(PREFIX)rtl/MAC_tx_arbiter.vhd 		\
 $(PREFIX)rtl/MAC_RMII.vhd 				\
-$(PREFIX)rtl/MAC_MII.vhd
\ No newline at end of file
+$(PREFIX)rtl/MAC_MII.vhd
+
+# Library analysis order, needed by simulators that analyse
+# every source up front (nvc)
+VHDL_LIB_ORDER += MAC
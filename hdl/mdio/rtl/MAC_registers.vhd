@@ -5,7 +5,10 @@ use ieee.numeric_std.all;
 entity MAC_registers is
 	generic (
 		C_S_AXI_DATA_WIDTH	: integer	:= 32;
-		C_S_AXI_ADDR_WIDTH	: integer	:= 32
+		C_S_AXI_ADDR_WIDTH	: integer	:= 32;
+		-- Width of the MAC's timestamps (MAC_pack.TIMESTAMP_WIDTH), zero
+		-- extended or cut to C_S_AXI_DATA_WIDTH in the registers
+		TIMESTAMP_WIDTH		: integer	:= 32
 	);
 	port (
 		clk             : in std_logic;
@@ -22,6 +25,17 @@ entity MAC_registers is
 		mdio_din_valid	: in std_logic;
 		mdio_busy_in    : in std_logic;
 		------------------------------------------------------------------------------
+		-- Timestamp signals
+		------------------------------------------------------------------------------
+		timestamp_in	: in std_logic_vector(TIMESTAMP_WIDTH-1 downto 0) := (others => '0');
+		tx_ts_data_in	: in std_logic_vector(TIMESTAMP_WIDTH-1 downto 0) := (others => '0');
+		tx_ts_empty_in	: in std_logic := '1';
+		tx_ts_rd_en		: out std_logic;
+		------------------------------------------------------------------------------
+		-- MAC control
+		------------------------------------------------------------------------------
+		loopback_mode	: out std_logic_vector(1 downto 0);
+		------------------------------------------------------------------------------
 		-- AXI lite interface
 		------------------------------------------------------------------------------
 		-- Address write channel
@@ -63,10 +77,12 @@ architecture rtl of MAC_registers is
 	signal axi_rvalid	: std_logic;
 
 	constant ADDR_LSB  			: integer := (C_S_AXI_DATA_WIDTH/32)+ 1;
-	constant OPT_MEM_ADDR_BITS 	: integer := 1;
+	constant OPT_MEM_ADDR_BITS 	: integer := 2;
 
 	signal mdio_config	: std_logic_vector(C_S_AXI_DATA_WIDTH-1 downto 0);
 	signal mdio_status	: std_logic_vector(C_S_AXI_DATA_WIDTH-1 downto 0);
+	signal tx_ts_status	: std_logic_vector(C_S_AXI_DATA_WIDTH-1 downto 0);
+	signal mac_ctrl		: std_logic_vector(C_S_AXI_DATA_WIDTH-1 downto 0) := (others => '0');
 
 	signal slv_reg_rden	: std_logic;
 	signal slv_reg_wren	: std_logic;
@@ -88,6 +104,11 @@ begin
 	mdio_status(31 downto 1) 	<= (others => '0');
 	mdio_status(0)  			<= mdio_busy_in;
 
+	tx_ts_status(C_S_AXI_DATA_WIDTH-1 downto 1)	<= (others => '0');
+	tx_ts_status(0)				<= not tx_ts_empty_in;
+
+	loopback_mode	<= mac_ctrl(1 downto 0);
+
 	S_AXI_AWREADY	<= axi_awready;
 	S_AXI_WREADY	<= axi_wready;
 	S_AXI_BRESP		<= axi_bresp;
@@ -159,20 +180,28 @@ begin
 			mdio_start <= '0';
 			if rstn = '0' then
 				mdio_config <= (others => '0');
+				mac_ctrl	<= (others => '0');
 			else
 				loc_addr := axi_awaddr(ADDR_LSB + OPT_MEM_ADDR_BITS downto ADDR_LSB);
 				if (slv_reg_wren = '1') then
 					case loc_addr is
 						-- MDIO config
-						when b"00" =>
+						when b"000" =>
 							for byte_index in 0 to (C_S_AXI_DATA_WIDTH/8-1) loop
 								if (S_AXI_WSTRB(byte_index) = '1') then
 									mdio_config(byte_index*8+7 downto byte_index*8) <= S_AXI_WDATA(byte_index*8+7 downto byte_index*8);
 								end if;
 							end loop;
 						-- MDIO ctrl register (Write 1 to start MDIO transaction)
-						when b"10" =>
+						when b"010" =>
 								mdio_start <= S_AXI_WDATA(0);
+						-- MAC control
+						when b"111" =>
+							for byte_index in 0 to (C_S_AXI_DATA_WIDTH/8-1) loop
+								if (S_AXI_WSTRB(byte_index) = '1') then
+									mac_ctrl(byte_index*8+7 downto byte_index*8) <= S_AXI_WDATA(byte_index*8+7 downto byte_index*8);
+								end if;
+							end loop;
 						when others =>
 							mdio_config <= mdio_config;
 					end case;
@@ -235,18 +264,33 @@ begin
 	-- Implement memory mapped register select
 	slv_reg_rden <= axi_arready and S_AXI_ARVALID and (not axi_rvalid);
 
-	process (mdio_config, mdio_data_in_reg, mdio_status, axi_araddr, rstn, slv_reg_rden)
+	-- Reading the TX timestamp pops it from the FIFO
+	tx_ts_rd_en <= slv_reg_rden when (axi_araddr(ADDR_LSB + OPT_MEM_ADDR_BITS downto ADDR_LSB) = b"100") else '0';
+
+	process (mdio_config, mdio_data_in_reg, mdio_status, tx_ts_data_in, tx_ts_status, timestamp_in, mac_ctrl, axi_araddr, rstn, slv_reg_rden)
 		variable loc_addr :std_logic_vector(OPT_MEM_ADDR_BITS downto 0);
 	begin
 		-- Address decoding for reading registers
 		loc_addr := axi_araddr(ADDR_LSB + OPT_MEM_ADDR_BITS downto ADDR_LSB);
 		case loc_addr is
-			when b"00" =>
+			when b"000" =>
 				reg_data_out <= mdio_config;
-			when b"01" =>
+			when b"001" =>
 				reg_data_out <= x"0000" & mdio_data_in_reg;
-			when b"11" =>
+			when b"011" =>
 				reg_data_out <= mdio_status;
+			-- Oldest TX timestamp, popped by the read
+			when b"100" =>
+				reg_data_out <= std_logic_vector(resize(unsigned(tx_ts_data_in), C_S_AXI_DATA_WIDTH));
+			-- Bit 0: TX timestamp available
+			when b"101" =>
+				reg_data_out <= tx_ts_status;
+			-- Current timestamp
+			when b"110" =>
+				reg_data_out <= std_logic_vector(resize(unsigned(timestamp_in), C_S_AXI_DATA_WIDTH));
+			-- MAC control, bits 1:0 loopback mode
+			when b"111" =>
+				reg_data_out <= mac_ctrl;
 			when others =>
 				reg_data_out  <= (others => '0');
 		end case;
@@ -3,4 +3,8 @@ mkfile_path := $(abspath $(lastword $(MAKEFILE_LIST)))
 PREFIX := $(dir $(mkfile_path))
 VHDL_SOURCES_MDIO := \
 $(PREFIX)rtl/MAC_registers.vhd		\
-$(PREFIX)rtl/MDIO_controller.vhd
\ No newline at end of file
+$(PREFIX)rtl/MDIO_controller.vhd
+
+# Library analysis order, needed by simulators that analyse
+# every source up front (nvc)
+VHDL_LIB_ORDER += MDIO
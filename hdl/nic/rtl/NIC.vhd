@@ -2,6 +2,9 @@ library ieee;
 use ieee.std_logic_1164.all;
 use ieee.numeric_std.all;
 
+library mac;
+library mdio;
+
 entity NIC is
     generic (
         DATA_WIDTH          : natural := 32;
@@ -66,7 +69,30 @@ entity NIC is
 end entity NIC;
 
 architecture rtl of NIC is
-    signal interrupts              : std_logic_vector(15 downto 0);
+    ---------------------------------------
+    -- MDIO
+    ---------------------------------------
+    signal mdio_phy_addr           : std_logic_vector(4 downto 0);
+    signal mdio_reg_addr           : std_logic_vector(4 downto 0);
+    signal mdio_wr_data            : std_logic_vector(15 downto 0);
+    signal mdio_rd_data            : std_logic_vector(15 downto 0);
+    signal mdio_rd_valid           : std_logic;
+    signal mdio_write              : std_logic;
+    signal mdio_start              : std_logic;
+    signal mdio_busy               : std_logic;
+
+    ---------------------------------------
+    -- Timestamps
+    ---------------------------------------
+    signal timestamp               : std_logic_vector(mac.MAC_pack.TIMESTAMP_WIDTH - 1 downto 0);
+    signal tx_ts_data              : std_logic_vector(mac.MAC_pack.TIMESTAMP_WIDTH - 1 downto 0);
+    signal tx_ts_empty             : std_logic;
+    signal tx_ts_rd_en             : std_logic;
+
+    ---------------------------------------
+    -- MAC control
+    ---------------------------------------
+    signal loopback_mode           : std_logic_vector(1 downto 0);
 
     ---------------------------------------
     -- AXI RX Data Stream 
@@ -107,6 +133,7 @@ architecture rtl of NIC is
 begin
 
     rstn_phy <= '1';
+    rx_m_axis_tready <= '1';
 
     --clk_wiz_inst : clk_wiz_0 port map (
     --    clk_in1     => sys_clk,
@@ -164,37 +191,83 @@ begin
         m_axis_tready   => cam_axis_tready
     );
 
-    mac_inst : entity work.MAC_RMII(rtl)
+    ------------------------------------------------------------------
+    -- MAC registers (AXI Lite) and MDIO controller
+    ------------------------------------------------------------------
+    MAC_registers_inst : entity mdio.MAC_registers(rtl)
+    generic map (
+        C_S_AXI_DATA_WIDTH  => DATA_WIDTH,
+        C_S_AXI_ADDR_WIDTH  => ADDR_WIDTH,
+        TIMESTAMP_WIDTH     => mac.MAC_pack.TIMESTAMP_WIDTH
+    ) port map (
+        clk                 => sys_clk,
+        rstn                => s_axi_aresetn,
+        -- MDIO signals
+        mdio_phy_addr       => mdio_phy_addr,
+        mdio_reg_addr       => mdio_reg_addr,
+        mdio_data_out       => mdio_wr_data,
+        mdio_write          => mdio_write,
+        mdio_start          => mdio_start,
+        mdio_data_in        => mdio_rd_data,
+        mdio_din_valid      => mdio_rd_valid,
+        mdio_busy_in        => mdio_busy,
+        -- Timestamps
+        timestamp_in        => timestamp,
+        tx_ts_data_in       => tx_ts_data,
+        tx_ts_empty_in      => tx_ts_empty,
+        tx_ts_rd_en         => tx_ts_rd_en,
+        -- MAC control
+        loopback_mode       => loopback_mode,
+        -- Address write channel
+        S_AXI_AWADDR        => s_axi_awaddr,
+        S_AXI_AWVALID       => s_axi_awvalid,
+        S_AXI_AWREADY       => s_axi_awready,
+        -- Write channel
+        S_AXI_WDATA         => s_axi_wdata,
+        S_AXI_WSTRB         => s_axi_wstrb,
+        S_AXI_WVALID        => s_axi_wvalid,
+        S_AXI_WREADY        => s_axi_wready,
+        -- Write response channel
+        S_AXI_BRESP         => s_axi_bresp,
+        S_AXI_BVALID        => s_axi_bvalid,
+        S_AXI_BREADY        => s_axi_bready,
+        -- Read address channel
+        S_AXI_ARADDR        => s_axi_araddr,
+        S_AXI_ARVALID       => s_axi_arvalid,
+        S_AXI_ARREADY       => s_axi_arready,
+        -- Read channel
+        S_AXI_RDATA         => s_axi_rdata,
+        S_AXI_RRESP         => s_axi_rresp,
+        S_AXI_RVALID        => s_axi_rvalid,
+        S_AXI_RREADY        => s_axi_rready
+    );
+
+    MDIO_controller_inst : entity mdio.MDIO_controller(rtl)
+    port map (
+        clk             => sys_clk,
+        -- Signals to phy
+        mdio_mdc        => mdio_mdc_out,
+        mdio_data_out   => mdio_data_out,
+        mdio_data_in    => mdio_data_in,
+        mdio_data_tri   => mdio_data_tri,
+        -- Signals to MAC
+        start           => mdio_start,
+        wr              => mdio_write,
+        phy_addr        => mdio_phy_addr,
+        reg_addr        => mdio_reg_addr,
+        data_in         => mdio_wr_data,
+        data_out        => mdio_rd_data,
+        data_out_valid  => mdio_rd_valid,
+        busy_out        => mdio_busy
+    );
+
+    ------------------------------------------------------------------
+    -- MAC
+    ------------------------------------------------------------------
+    mac_inst : entity mac.MAC_RMII(rtl)
     port map (
         clk                     => sys_clk,
         rst                     => rst,
-        interrupts              => interrupts,
-        ---------------------------------------
-        -- AXI Lite Slave 
-        ---------------------------------------
-        s_axi_aresetn           => s_axi_aresetn,
-        -- Read Address Channel
-        s_axi_araddr            => s_axi_araddr,
-        s_axi_arvalid           => s_axi_arvalid,
-        s_axi_arready           => s_axi_arready,
-        -- Read Data Channel
-        s_axi_rdata             => s_axi_rdata,
-        s_axi_rresp             => s_axi_rresp,
-        s_axi_rvalid            => s_axi_rvalid,
-        s_axi_rready            => s_axi_rready,
-        -- Write Address Channel 
-        s_axi_awaddr            => s_axi_awaddr,
-        s_axi_awvalid           => s_axi_awvalid,
-        s_axi_awready           => s_axi_awready,
-        -- Write Data Channel
-        s_axi_wvalid            => s_axi_wvalid,
-        s_axi_wdata             => s_axi_wdata,
-        s_axi_wstrb             => s_axi_wstrb,
-        s_axi_wready            => s_axi_wready,
-        -- Write Response Channel 
-        s_axi_bresp             => s_axi_bresp,
-        s_axi_bvalid            => s_axi_bvalid,
-        s_axi_bready            => s_axi_bready,
         ---------------------------------------
         -- AXI RX Data Stream 
         ---------------------------------------
@@ -203,6 +276,7 @@ begin
         rx_m_axis_tvalid        => rx_m_axis_tvalid,
         rx_m_axis_tready        => rx_m_axis_tready,
         rx_m_axis_tlast         => rx_m_axis_tlast,
+        rx_m_axis_tuser         => open,
         ---------------------------------------
         -- AXI TX Data Stream 
         ---------------------------------------
@@ -212,12 +286,13 @@ begin
         tx_s_axis_tready        => tx_s_axis_tready,
         tx_s_axis_tlast         => tx_s_axis_tlast,
         ---------------------------------------
-        -- PHY MDIO signals
+        -- Timestamps
         ---------------------------------------
-        mdio_mdc_out            => mdio_mdc_out,
-        mdio_data_out           => mdio_data_out,
-        mdio_data_in            => mdio_data_in,
-        mdio_data_tri           => mdio_data_tri,
+        timestamp_out           => timestamp,
+        tx_ts_data              => tx_ts_data,
+        tx_ts_empty             => tx_ts_empty,
+        tx_ts_rd_en             => tx_ts_rd_en,
+        loopback_mode           => loopback_mode,
         ---------------------------------------
         -- RMII PHY interface
         ---------------------------------------
@@ -2,6 +2,8 @@ library ieee;
 use ieee.std_logic_1164.all;
 use ieee.numeric_std.all;
 
+library comp;
+
 entity Ov7670_reader is
     port (
         clk                 : in std_logic;
@@ -46,7 +48,7 @@ begin
     new_frame <= vsync_re;
     new_row   <= href_re;
 
-    sync_data_in_inst : entity work.simple_pipe(rtl)
+    sync_data_in_inst : entity comp.simple_pipe(rtl)
     generic map (
         PIPE_WIDTH  => data_in'length,
         DEPTH       => 2
@@ -90,7 +92,7 @@ begin
     end process cap_data_proc;
 
     m_axis_tvalid <= not ofifo_empty;
-    data_out_fifo_inst : entity work.sync_fifo(rtl)
+    data_out_fifo_inst : entity comp.sync_fifo(rtl)
     generic map (
         DATA_WIDTH  => 8,
         DEPTH       => 8
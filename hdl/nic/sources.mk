@@ -1,7 +1,11 @@
-# MDIO lib
+# NIC lib
 mkfile_path := $(abspath $(lastword $(MAKEFILE_LIST)))
 PREFIX := $(dir $(mkfile_path))
 VHDL_SOURCES_NIC := \
-$(PREFIX)rtl/NIC.vhd					\
 $(PREFIX)rtl/Ov7670_reader.vhd			\
 $(PREFIX)rtl/udp_traffic_gen.vhd		\
+$(PREFIX)rtl/NIC.vhd
+
+# Library analysis order, needed by simulators that analyse
+# every source up front (nvc)
+VHDL_LIB_ORDER += NIC
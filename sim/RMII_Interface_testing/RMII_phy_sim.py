@@ -9,6 +9,8 @@ from cocotbext.eth import GmiiFrame, MiiPhy
 from cocotb.clock import Clock
 from cocotb.triggers import RisingEdge
 from cocotbext.axi import (AxiStreamBus, AxiStreamSource, AxiStreamSink, AxiStreamMonitor)
+from waves import capture_waves
+from sim_profile import profile_sim
 
 class RMII_Source:
 
@@ -70,6 +72,8 @@ async def load_pkt(dut, pkt : bytearray):
 
 # Test RX pipeline of RMII interface 
 @cocotb.test()
+@capture_waves
+@profile_sim
 async def rmii_standard_rx_test(dut):
     # init values
     dut.m_axis_tready.value = 1
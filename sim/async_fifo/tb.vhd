@@ -5,11 +5,13 @@ use ieee.numeric_std.all;
 library comp;
 
 entity tb is
+    generic (
+        DATA_WIDTH : natural := 8;
+        DEPTH      : natural := 16
+    );
 end entity tb;
 
 architecture rtl of tb is
-    constant DATA_WIDTH : natural := 8;
-    constant DEPTH      : natural := 16;
 
     -- Write port
     signal wr_clk  : std_logic := '0';
@@ -0,0 +1,26 @@
+# Sweeps the async FIFO generics and clock ratios, one sim per combination.
+# Run from sim/ with: pytest -n auto async_fifo
+from pathlib import Path
+
+import pytest
+
+from sim_runner import run_tb
+
+TB_DIR = Path(__file__).resolve().parent
+
+# (write, read) clock periods in ns
+CLOCK_PERIODS = [(10, 7), (262, 3), (4, 341), (10, 10)]
+
+# Tests that take their clocks from the environment
+CLOCKED_TESTS = ["empty_full_empty", "empty_partial_fill_empty", "emtpy_full_partial_empty_full"]
+
+
+@pytest.mark.parametrize("periods", CLOCK_PERIODS, ids=lambda p: "wr%d_rd%d" % p)
+@pytest.mark.parametrize("data_width", [8, 16, 32])
+@pytest.mark.parametrize("depth", [8, 16, 64])
+def test_async_fifo(depth, data_width, periods):
+    wr_period, rd_period = periods
+    run_tb(TB_DIR, "async_fifo_sim", ["comp"],
+           parameters={"DATA_WIDTH": data_width, "DEPTH": depth},
+           extra_env={"WRITE_CLOCK_PERIOD": str(wr_period), "READ_CLOCK_PERIOD": str(rd_period)},
+           testcase=CLOCKED_TESTS)
@@ -0,0 +1,103 @@
+"""
+Benchmark tests of the MAC testbenches.
+
+The mac_*_benchmark tests push a batch of frames through the MAC and record
+the throughput and latency as properties of the testsuite in results.xml,
+named "bench:<test name>:<metric>". The metrics are the ones of
+mac_perf_model.PerfResult and the frame lengths come from the same traffic
+generator, so the runs can be compared with the performance model. The
+settings come from the environment:
+
+    BENCH_FRAMES    Number of frames. Default: 20
+    BENCH_LEN       Frame length without FCS. Default: 0, the random lengths
+                    of the MAC tests' eth_frame.gen_pkt
+    BENCH_SEED      Seed of the random frame lengths. Default: 1
+"""
+import collections
+import logging
+import os
+import xml.etree.ElementTree
+
+import cocotb
+
+from mac_perf_model import frame_lengths
+
+logger = logging.getLogger("cocotb.bench")
+
+PROPERTY_PREFIX = "bench"
+DEFAULT_FRAMES = 20
+DEFAULT_SEED = 1
+
+
+class BenchConfig:
+    """ BENCH_* settings of a test """
+
+    def __init__(self, frames=DEFAULT_FRAMES, length=0, seed=DEFAULT_SEED):
+        self.frames = frames
+        self.length = length
+        self.seed = seed
+
+    @classmethod
+    def from_env(cls):
+        return cls(frames=int(os.getenv("BENCH_FRAMES", "") or DEFAULT_FRAMES),
+                   length=int(os.getenv("BENCH_LEN", "") or 0),
+                   seed=int(os.getenv("BENCH_SEED", "") or DEFAULT_SEED))
+
+    def env(self):
+        """ The settings as environment for a test run """
+        return {"BENCH_FRAMES": str(self.frames), "BENCH_LEN": str(self.length), "BENCH_SEED": str(self.seed)}
+
+    def lengths(self):
+        """ Frame lengths without FCS """
+        return frame_lengths(self.frames, self.length, self.seed)
+
+
+def record(test_name: str, result):
+    """ Add the metrics of a PerfResult to the xunit results of the regression """
+    logger.info(result.summary())
+    regression_manager = getattr(cocotb, "regression_manager", None)
+    if regression_manager is None:
+        return
+    for metric, value in result.as_dict().items():
+        name = "%s:%s:%s" % (PROPERTY_PREFIX, test_name, metric)
+        regression_manager.xunit.add_property(name=name, value=str(value))
+
+
+def read_results(xml_file):
+    """ Collect the benchmark properties of xml_file as {test: {metric: value}}. """
+    tree = xml.etree.ElementTree.parse(xml_file)
+    results = collections.OrderedDict()
+    for prop in tree.getroot().iter("property"):
+        parts = prop.attrib.get("name", "").split(":", 2)
+        if len(parts) != 3 or parts[0] != PROPERTY_PREFIX:
+            continue
+        _, test_name, metric = parts
+        results.setdefault(test_name, collections.OrderedDict())[metric] = float(prop.attrib.get("value", "nan"))
+    return results
+
+
+def compare(measured: dict, result, throughput_tol=0.02, latency_tol=0.05):
+    """ Differences between benchmark metrics and a model PerfResult beyond the
+    relative tolerances, as a list of messages.
+
+    Once a frame was dropped only the drop itself is compared, the RX pipeline
+    doesn't recover its framing after a drop.
+    """
+    model = result.as_dict()
+    if measured.get("dropped") or model["dropped"]:
+        if bool(measured.get("dropped")) != bool(model["dropped"]):
+            return ["dropped: measured %d, model %d" % (measured.get("dropped", 0), model["dropped"])]
+        return []
+    errors = []
+    for metric in ("frames", "bytes"):
+        if measured.get(metric) != model[metric]:
+            errors.append("%s: measured %s, model %s" % (metric, measured.get(metric), model[metric]))
+    tolerances = [("throughput_mbps", throughput_tol)]
+    tolerances += [(metric, latency_tol) for metric in ("latency_min_ns", "latency_avg_ns", "latency_max_ns")]
+    for metric, tol in tolerances:
+        if metric not in measured or metric not in model:
+            continue
+        if abs(model[metric] - measured[metric]) > tol * measured[metric]:
+            errors.append("%s: measured %s, model %s (tolerance %d%%)" % (
+                metric, measured[metric], model[metric], tol * 100))
+    return errors
@@ -0,0 +1,373 @@
+"""
+Cycle-approximate performance model of the MAC TX and RX pipelines.
+
+Answers throughput and latency questions, e.g. what PIPELINE_ELEM_CNT=3 gets
+with 256 byte frames, without a simulator run. Frames are moved through the
+stages of the RTL as events instead of clock by clock, so millions of frames
+take seconds:
+
+    python mac_perf_model.py --pipes 1 2 3 --len 256 --frames 1000000
+
+TX (MAC_tx_pipeline):
+  - fb_pipeline_writer hands the frames to the frame builder pipes round robin.
+    After a frame it waits in NEXT_PIPE until the next pipe is empty.
+  - tx_crc_pipe takes a byte per cycle, APPENDs the 4 FCS bytes and flags
+    crc_done a cycle later. frame_builder_pipe delays frame_ready by its 8 byte
+    preamble/SFD pipe.
+  - fb_pipeline_reader reads the pipes in order, one frame at a time, and waits
+    until the PHY interface has sent the frame and its inter packet gap.
+  - The PHY interface drains its 32 byte TX FIFO at the line rate.
+
+RX (MAC_rx_pipeline):
+  - A frame is done a timeout after the end of the frame on the wire, then its
+    FCS is checked.
+  - MAC_rx_mtr_axis streams the frame out of the single frame pkt_buffer at a
+    byte per cycle. A frame that passes its FCS check while the previous one is
+    still being streamed out is never sent. (The RTL also leaves the bytes of
+    such a frame in pkt_buffer, which the model doesn't follow.)
+
+Frame lengths are Ethernet frames without FCS, as on the AXIS side of the MAC.
+The traffic generators mirror the testbenches: the random lengths of the MAC
+tests' eth_frame.gen_pkt, udp_traffic_gen's frame or a pcap. The stage
+latencies are worked out from the RTL and checked against the benchmark tests
+of the MAC testbenches, see sim/mac_mii_phy/test_mac_mii_perf.py. The default
+configuration is compared in every pytest run, pytest --perf-calibration adds
+the frame length and TX_UNFOLD_CNT sweep.
+"""
+import argparse
+import collections
+import random
+import time
+
+from stats import LatencyStats
+
+SYS_CLK_NS = 10
+
+ETH_HEADER_SIZE = 14
+ETH_MIN_PAYLOAD = 46
+FCS_SIZE = 4
+START_SEQ_SIZE = 8          # Preamble + SFD
+INTER_PKT_GAP_SIZE = 12
+MAX_ETH_FRAME_SIZE = 1530   # frame_builder_pipe frame FIFO / pkt_buffer depth
+UDP_FRAME_LEN = 1324        # udp_traffic_gen PKT_MAX_LEN
+
+# TX stage latencies in sys_clk cycles
+WRITER_NEXT_PIPE_CYCLES = 2     # tlast beat to the first beat of the next frame
+CRC_APPEND_CYCLES = FCS_SIZE + 1
+FRAME_READY_CYCLES = START_SEQ_SIZE
+READER_START_CYCLES = 1         # frame_ready to BUSY
+TX_PHY_START_CYCLES = 2         # Reader and skid buffers to the PHY TX FIFO
+PHY_DONE_CYCLES = 6             # tx_busy sync, phy_done edge, WAIT_FOR_PHY -> IDLE
+# TX stage latencies in PHY clock cycles
+TX_FIFO_SYNC_PHY_CYCLES = 3     # TX FIFO empty flag sync and WAIT_FOR_PKT
+TX_END_PHY_CYCLES = 2           # Empty FIFO seen and gap counter compare
+
+# RX stage latencies
+RX_TIMEOUT_PHY_CYCLES = 9       # End of frame to phy_rx_pkt_done
+RX_DONE_CYCLES = 4              # rx_done sync, frame_done, fcs_passed
+RX_MTR_START_CYCLES = 1         # fcs_passed to STREAM
+
+
+class PhyTiming:
+    """ Timing of a PHY interface at 100 Mbit
+
+    clk_ns:         PHY clock period (MII tx_clk/rx_clk, RMII reference clock)
+    clks_per_byte:  PHY clock cycles per byte on the wire
+    fifo_depth:     Depth of the TX FIFO of the interface
+    """
+
+    def __init__(self, name: str, clk_ns, clks_per_byte: int, fifo_depth: int = 32):
+        self.name = name
+        self.clk_ns = clk_ns
+        self.clks_per_byte = clks_per_byte
+        self.byte_ns = clk_ns * clks_per_byte
+        self.ipg_clks = INTER_PKT_GAP_SIZE * clks_per_byte
+        self.fifo_depth = fifo_depth
+
+
+PHYS = {
+    "mii": PhyTiming("mii", 40, 2),
+    "rmii": PhyTiming("rmii", 20, 4),
+}
+
+
+class PerfResult:
+    """ Throughput and latency of the frames through one direction of the MAC.
+
+    Filled by the models and by the benchmark tests of the testbenches, so both
+    report the same metrics.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.frames = 0
+        self.dropped = 0
+        self.bytes = 0
+        self.start_ns = None
+        self.end_ns = None
+        self.latency = LatencyStats()
+
+    def add(self, in_ns, out_ns, nbytes: int):
+        """ Frame of nbytes (with FCS) into the MAC at in_ns and out at out_ns """
+        self.frames += 1
+        self.bytes += nbytes
+        if self.start_ns is None or in_ns < self.start_ns:
+            self.start_ns = in_ns
+        if self.end_ns is None or out_ns > self.end_ns:
+            self.end_ns = out_ns
+        self.latency.add(out_ns - in_ns)
+
+    def drop(self):
+        self.dropped += 1
+
+    def span_ns(self):
+        if self.start_ns is None:
+            return 0
+        return self.end_ns - self.start_ns
+
+    def throughput_mbps(self):
+        """ Frame bits (with FCS) per us from the first frame in to the last out """
+        span = self.span_ns()
+        return self.bytes * 8 * 1e3 / span if span else 0.0
+
+    def as_dict(self):
+        metrics = collections.OrderedDict()
+        metrics["frames"] = self.frames
+        metrics["dropped"] = self.dropped
+        metrics["bytes"] = self.bytes
+        metrics["span_ns"] = round(self.span_ns())
+        metrics["throughput_mbps"] = round(self.throughput_mbps(), 3)
+        if self.latency.count:
+            metrics["latency_min_ns"] = self.latency.percentile(0)
+            metrics["latency_avg_ns"] = round(self.latency.mean(), 1)
+            metrics["latency_p99_ns"] = self.latency.percentile(0.99)
+            metrics["latency_max_ns"] = self.latency.percentile(1)
+        return metrics
+
+    def summary(self):
+        text = "%s: %d frames, %d dropped, %.2f Mbit/s" % (
+            self.name, self.frames, self.dropped, self.throughput_mbps())
+        if self.latency.count:
+            text += "; latency ns min %d avg %.0f p99 %d max %d" % (
+                self.latency.percentile(0), self.latency.mean(),
+                self.latency.percentile(0.99), self.latency.percentile(1))
+        return text
+
+
+class TxModel:
+    """ MAC_tx_pipeline with PIPELINE_ELEM_CNT pipes followed by a PHY interface """
+
+    def __init__(self, pipes: int = 2, phy: str = "mii", clk_ns=SYS_CLK_NS):
+        if pipes < 1:
+            raise ValueError("A TX pipeline needs at least one pipe")
+        self.pipes = pipes
+        self.phy = PHYS[phy]
+        self.clk_ns = clk_ns
+
+    def run(self, traffic):
+        """ Run (arrival_ns, length) frames through the model. Returns a PerfResult.
+
+        A frame is offered on the AXIS input at its arrival time, or right after
+        the previous frame. Its latency runs from there to the end of the frame
+        on the wire.
+        """
+        clk = self.clk_ns
+        phy = self.phy
+        max_len = MAX_ETH_FRAME_SIZE - START_SEQ_SIZE - FCS_SIZE
+        result = PerfResult("TX (AXIS in -> %s out)" % (phy.name.upper()))
+        latencies = result.latency.hist
+        next_pipe_ns = WRITER_NEXT_PIPE_CYCLES * clk
+        ready_ns = (CRC_APPEND_CYCLES + FRAME_READY_CYCLES) * clk
+        reader_start_ns = READER_START_CYCLES * clk
+        wire_delay_ns = reader_start_ns + TX_PHY_START_CYCLES * clk + TX_FIFO_SYNC_PHY_CYCLES * phy.clk_ns
+        wire_overhead = START_SEQ_SIZE + FCS_SIZE
+        fifo_ns = phy.fifo_depth * phy.byte_ns
+        phy_done_ns = (TX_END_PHY_CYCLES + phy.ipg_clks) * phy.clk_ns
+        reader_done_ns = PHY_DONE_CYCLES * clk
+        byte_ns = phy.byte_ns
+        pipes = self.pipes
+
+        pipe_empty = [0] * pipes
+        pipe = 0
+        last_beat = -clk
+        writer_free = 0
+        reader_idle = 0
+        frames = 0
+        nbytes = 0
+        start_ns = None
+        for arrival, length in traffic:
+            if not 0 < length <= max_len:
+                raise ValueError("Frame length %d doesn't fit the frame builder pipe" % (length))
+            offered = -(-max(arrival, last_beat + clk) // clk) * clk
+            # Writer in IDLE and the pipe empty (NEXT_PIPE leaves a cycle after)
+            start = max(offered, writer_free, -(-pipe_empty[pipe] // clk) * clk + clk)
+            last_beat = start + (length - 1) * clk
+            writer_free = last_beat + next_pipe_ns
+
+            # Reader, one frame at a time in pipe order
+            busy = max(last_beat + ready_ns, reader_idle)
+            wire_bytes = wire_overhead + length
+            wire_end = busy + wire_delay_ns + wire_bytes * byte_ns
+            # The pipe is empty once the rest of the frame fits in the PHY FIFO
+            pipe_empty[pipe] = max(busy + reader_start_ns + (wire_bytes + TX_PHY_START_CYCLES) * clk,
+                                   wire_end - fifo_ns)
+            reader_idle = -(-(wire_end + phy_done_ns) // clk) * clk + reader_done_ns
+
+            pipe = pipe + 1 if pipe + 1 < pipes else 0
+            frames += 1
+            nbytes += length + FCS_SIZE
+            latencies[int(round(wire_end - offered))] += 1
+            if start_ns is None:
+                start_ns = offered
+        if frames:
+            result.frames, result.bytes = frames, nbytes
+            result.start_ns, result.end_ns = start_ns, wire_end
+        return result
+
+
+class RxModel:
+    """ PHY interface followed by MAC_rx_pipeline """
+
+    def __init__(self, phy: str = "mii", clk_ns=SYS_CLK_NS):
+        self.phy = PHYS[phy]
+        self.clk_ns = clk_ns
+
+    def run(self, traffic):
+        """ Run (arrival_ns, length) frames through the model. Returns a PerfResult.
+
+        A frame goes on the wire at its arrival time, or an inter packet gap
+        after the previous frame. Its latency runs from the last PHY clock cycle
+        of the frame on the wire to its last byte on the AXIS output.
+        """
+        clk = self.clk_ns
+        phy = self.phy
+        result = PerfResult("RX (%s in -> AXIS out)" % (phy.name.upper()))
+        latencies = result.latency.hist
+        wire_overhead = START_SEQ_SIZE + FCS_SIZE
+        gap_ns = INTER_PKT_GAP_SIZE * phy.byte_ns
+        timeout_ns = RX_TIMEOUT_PHY_CYCLES * phy.clk_ns
+        done_ns = RX_DONE_CYCLES * clk
+        mtr_start_cycles = RX_MTR_START_CYCLES + FCS_SIZE
+        byte_ns = phy.byte_ns
+
+        wire_free = 0
+        mtr_idle = 0
+        frames = 0
+        nbytes = 0
+        start_ns = None
+        last = None
+        for arrival, length in traffic:
+            wire_end = max(arrival, wire_free) + (wire_overhead + length) * byte_ns
+            wire_free = wire_end + gap_ns
+
+            passed = -(-(wire_end + timeout_ns) // clk) * clk + done_ns
+            if passed < mtr_idle or length + FCS_SIZE > MAX_ETH_FRAME_SIZE:
+                # trans_packet_in is missed while the previous frame streams out
+                result.dropped += 1
+                continue
+            last = passed + (mtr_start_cycles + length) * clk
+            mtr_idle = last + clk
+
+            frames += 1
+            nbytes += length + FCS_SIZE
+            latencies[int(round(last - wire_end + phy.clk_ns))] += 1
+            if start_ns is None:
+                start_ns = wire_end - phy.clk_ns
+        if frames:
+            result.frames, result.bytes = frames, nbytes
+            result.start_ns, result.end_ns = start_ns, last
+        return result
+
+
+#############################################
+# Traffic generators
+#############################################
+def gen_pkt_lengths(count=None, seed=None):
+    """ Frame lengths of eth_frame.gen_pkt with the random payloads of the MAC
+    tests: 0 to 999 characters, padded to 46 """
+    rng = random.Random(seed)
+    n = 0
+    while count is None or n < count:
+        yield ETH_HEADER_SIZE + max(ETH_MIN_PAYLOAD, int(rng.random() * 1000))
+        n += 1
+
+
+def frame_lengths(count, length=0, seed=None):
+    """ count frame lengths, random gen_pkt lengths when length is 0 """
+    if length:
+        return [length] * count
+    return list(gen_pkt_lengths(count, seed))
+
+
+def saturated(lengths):
+    """ Every frame is offered as soon as the MAC takes it """
+    for length in lengths:
+        yield 0, length
+
+
+def offered_load(lengths, load, phy: str = "mii"):
+    """ Frames spaced to a fraction of the line rate, inter packet gap included """
+    byte_ns = PHYS[phy].byte_ns
+    arrival = 0
+    for length in lengths:
+        yield arrival, length
+        arrival += (START_SEQ_SIZE + length + FCS_SIZE + INTER_PKT_GAP_SIZE) * byte_ns / load
+
+
+def pcap_traffic(filename, time_scale=1.0, max_frames=None):
+    """ Frames of a pcap/pcapng with their capture timing, 0 for back to back """
+    # Imported here, the model itself runs without cocotb
+    from pcap import PcapReader
+    first_ns = None
+    for n, record in enumerate(PcapReader(filename)):
+        if max_frames is not None and n >= max_frames:
+            break
+        if first_ns is None:
+            first_ns = record.time_ns
+        yield (record.time_ns - first_ns) * time_scale, len(record.data)
+
+
+def create_argparser():
+    parser = argparse.ArgumentParser(description="Performance model of the MAC TX and RX pipelines")
+    parser.add_argument("--phy", choices=sorted(PHYS), default="mii", help="PHY interface. Default: mii")
+    parser.add_argument("--pipes", type=int, nargs="+", default=[2],
+                        help="TX frame builder pipes (PIPELINE_ELEM_CNT), several to compare. Default: 2")
+    parser.add_argument("--len", type=int, default=0, dest="length",
+                        help="Frame length without FCS. Default: 0, random eth_frame.gen_pkt lengths")
+    parser.add_argument("--udp", action="store_true", help="udp_traffic_gen frames (%d bytes)" % (UDP_FRAME_LEN))
+    parser.add_argument("--frames", type=int, default=100000, help="Number of frames. Default: 100000")
+    parser.add_argument("--load", type=float, default=0,
+                        help="Offered load as a fraction of the line rate. Default: 0, saturated")
+    parser.add_argument("--pcap", help="Take the frames and their timing from a pcap/pcapng")
+    parser.add_argument("--time-scale", type=float, default=1.0, help="Scale of the pcap timing. Default: 1")
+    parser.add_argument("--seed", type=int, default=1, help="Seed of the random frame lengths. Default: 1")
+    return parser
+
+
+def main():
+    args = create_argparser().parse_args()
+
+    def traffic():
+        if args.pcap:
+            return pcap_traffic(args.pcap, args.time_scale, args.frames)
+        length = UDP_FRAME_LEN if args.udp else args.length
+        if length:
+            lengths = (length for _ in range(args.frames))
+        else:
+            lengths = gen_pkt_lengths(args.frames, args.seed)
+        if args.load > 0:
+            return offered_load(lengths, args.load, args.phy)
+        return saturated(lengths)
+
+    models = [TxModel(pipes, args.phy) for pipes in args.pipes] + [RxModel(args.phy)]
+    for model in models:
+        wall_start = time.perf_counter()
+        result = model.run(traffic())
+        wall_s = time.perf_counter() - wall_start
+        name = "pipes=%d " % (model.pipes) if isinstance(model, TxModel) else ""
+        print("%s%s" % (name, result.summary()))
+        print("  %d frames in %.2f s" % (result.frames + result.dropped, wall_s))
+
+
+if __name__ == "__main__":
+    main()
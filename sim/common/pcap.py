@@ -0,0 +1,331 @@
+"""
+PCAP/PCAPNG replay and capture for the MAC testbenches.
+
+Frames are read lazily, one record at a time, so captures of any size can be
+replayed without loading them into memory. The settings come from the
+environment:
+
+    PCAP_IN             .pcap/.pcapng file replayed into the MAC RX side
+    PCAP_OUT            File the frames transmitted by the MAC are written to
+    PCAP_TIME_SCALE     Scale applied to the capture's inter-frame timing.
+                        1 (default) keeps the original timing, 0.1 replays it
+                        10 times faster and 0 sends frames back to back.
+    PCAP_MAX_FRAMES     Stop after this many frames
+
+Only Ethernet link types are replayed. Captured frames don't have an FCS, it
+is added when the frame is put on the wire. Runt frames (captured on the
+sending host, before the NIC padded them) are padded to the minimum length,
+the MAC drops shorter frames. Written captures have nanosecond
+timestamps taken from sim time.
+"""
+import collections
+import logging
+import os
+import struct
+
+from cocotb.triggers import Timer
+from cocotb.utils import get_sim_time, get_time_from_sim_steps
+
+from stats import LatencyStats
+
+logger = logging.getLogger("cocotb.pcap")
+
+LINKTYPE_ETHERNET = 1
+ETH_MIN_LEN = 60        # Without FCS
+ETH_MAX_LEN = 1514      # Without FCS
+
+_PCAP_MAGIC_US = 0xa1b2c3d4
+_PCAP_MAGIC_NS = 0xa1b23c4d
+_PCAPNG_SHB = 0x0a0d0d0a
+_PCAPNG_BYTE_ORDER_MAGIC = 0x1a2b3c4d
+_PCAPNG_IDB = 0x00000001
+_PCAPNG_OPB = 0x00000002    # Obsolete packet block
+_PCAPNG_SPB = 0x00000003
+_PCAPNG_EPB = 0x00000006
+_PCAPNG_OPT_IF_TSRESOL = 9
+
+PcapRecord = collections.namedtuple("PcapRecord", ["time_ns", "data"])
+
+
+def steps_to_ns(steps):
+    """ Sim steps (cocotbext frame sim_time_* fields) to ns """
+    return get_time_from_sim_steps(steps, "ns")
+
+
+class PcapReader:
+    """ Iterates over the Ethernet frames of a .pcap or .pcapng file.
+
+    Records are read one at a time. Frames that were truncated by the capture's
+    snaplen, are longer than max_len, are not Ethernet or refer to a pcapng
+    interface that wasn't described are skipped and counted.
+    Frames shorter than min_len are padded with zeros and counted.
+    """
+
+    def __init__(self, filename, max_len=ETH_MAX_LEN, min_len=ETH_MIN_LEN):
+        self.filename = filename
+        self.max_len = max_len
+        self.min_len = min_len
+        self.frames = 0
+        self.padded = 0
+        self.skipped_truncated = 0
+        self.skipped_oversize = 0
+        self.skipped_linktype = 0
+        self.skipped_no_interface = 0
+
+    def __iter__(self):
+        with open(self.filename, "rb") as f:
+            magic = f.read(4)
+            f.seek(0)
+            if len(magic) < 4:
+                return
+            if struct.unpack("<I", magic)[0] == _PCAPNG_SHB:
+                records = self._read_pcapng(f)
+            else:
+                records = self._read_pcap(f)
+            for time_ns, linktype, data, orig_len in records:
+                if linktype != LINKTYPE_ETHERNET:
+                    self.skipped_linktype += 1
+                elif len(data) < orig_len:
+                    self.skipped_truncated += 1
+                elif self.max_len is not None and len(data) > self.max_len:
+                    self.skipped_oversize += 1
+                else:
+                    data = bytes(data)
+                    if self.min_len is not None and len(data) < self.min_len:
+                        data += bytes(self.min_len - len(data))
+                        self.padded += 1
+                    self.frames += 1
+                    yield PcapRecord(time_ns, data)
+
+    def skipped(self):
+        return (self.skipped_truncated + self.skipped_oversize + self.skipped_linktype
+                + self.skipped_no_interface)
+
+    def _read_pcap(self, f):
+        header = f.read(24)
+        if len(header) < 24:
+            return
+        for endian in "<>":
+            magic = struct.unpack(endian + "I", header[:4])[0]
+            if magic in (_PCAP_MAGIC_US, _PCAP_MAGIC_NS):
+                break
+        else:
+            raise ValueError("%s is not a pcap or pcapng file" % (self.filename))
+        frac_ns = 1 if magic == _PCAP_MAGIC_NS else 1000
+        linktype = struct.unpack(endian + "I", header[20:24])[0] & 0x0fffffff
+        record_header = struct.Struct(endian + "IIII")
+        while True:
+            header = f.read(record_header.size)
+            if len(header) < record_header.size:
+                return
+            ts_sec, ts_frac, incl_len, orig_len = record_header.unpack(header)
+            data = f.read(incl_len)
+            if len(data) < incl_len:
+                logger.warning("%s ends in a truncated record", self.filename)
+                return
+            yield ts_sec * 1000000000 + ts_frac * frac_ns, linktype, data, orig_len
+
+    def _read_pcapng(self, f):
+        endian = "<"
+        # (linktype, ns per timestamp unit) of each interface of the current section
+        interfaces = []
+        last_time_ns = 0
+        while True:
+            header = f.read(8)
+            if len(header) < 8:
+                return
+            block_type = struct.unpack(endian + "I", header[:4])[0]
+            if block_type == _PCAPNG_SHB:
+                byte_order = f.read(4)
+                endian = "<" if struct.unpack("<I", byte_order)[0] == _PCAPNG_BYTE_ORDER_MAGIC else ">"
+                block_len = struct.unpack(endian + "I", header[4:])[0]
+                body = byte_order + f.read(block_len - 12)
+                interfaces = []
+            else:
+                block_len = struct.unpack(endian + "I", header[4:])[0]
+                body = f.read(block_len - 8)
+            if len(body) < block_len - 8 or block_len < 12:
+                logger.warning("%s ends in a truncated block", self.filename)
+                return
+            body = body[:-4]    # Trailing block length
+
+            if block_type == _PCAPNG_IDB:
+                linktype = struct.unpack(endian + "H", body[:2])[0]
+                interfaces.append((linktype, self._pcapng_ts_unit_ns(body[8:], endian)))
+            elif block_type == _PCAPNG_EPB:
+                if_id, ts_high, ts_low, cap_len, orig_len = struct.unpack(endian + "IIIII", body[:20])
+                if if_id >= len(interfaces):
+                    self.skipped_no_interface += 1
+                    continue
+                linktype, unit_ns = interfaces[if_id]
+                last_time_ns = int(((ts_high << 32) | ts_low) * unit_ns)
+                yield last_time_ns, linktype, body[20:20 + cap_len], orig_len
+            elif block_type == _PCAPNG_OPB:
+                if_id, _, ts_high, ts_low, cap_len, orig_len = struct.unpack(endian + "HHIIII", body[:20])
+                if if_id >= len(interfaces):
+                    self.skipped_no_interface += 1
+                    continue
+                linktype, unit_ns = interfaces[if_id]
+                last_time_ns = int(((ts_high << 32) | ts_low) * unit_ns)
+                yield last_time_ns, linktype, body[20:20 + cap_len], orig_len
+            elif block_type == _PCAPNG_SPB:
+                # No timestamp, keep the one of the previous packet
+                orig_len = struct.unpack(endian + "I", body[:4])[0]
+                if not interfaces:
+                    self.skipped_no_interface += 1
+                    continue
+                linktype, _ = interfaces[0]
+                yield last_time_ns, linktype, body[4:4 + orig_len], orig_len
+
+    @staticmethod
+    def _pcapng_ts_unit_ns(options, endian):
+        """ Timestamp unit of an interface from its if_tsresol option. Default: 1us """
+        offset = 0
+        while offset + 4 <= len(options):
+            code, length = struct.unpack(endian + "HH", options[offset:offset + 4])
+            if code == 0:
+                break
+            if code == _PCAPNG_OPT_IF_TSRESOL and length >= 1:
+                tsresol = options[offset + 4]
+                if tsresol & 0x80:
+                    return 1e9 / (2 ** (tsresol & 0x7f))
+                return 1e9 / (10 ** tsresol)
+            offset += 4 + ((length + 3) & ~3)
+        return 1000
+
+
+class PcapWriter:
+    """ Writes Ethernet frames to a pcap file with nanosecond timestamps. """
+
+    def __init__(self, filename, snaplen=65535):
+        self.filename = filename
+        self.frames = 0
+        self._f = open(filename, "wb")
+        self._f.write(struct.pack("<IHHiIII", _PCAP_MAGIC_NS, 2, 4, 0, 0, snaplen, LINKTYPE_ETHERNET))
+
+    def write(self, time_ns, data):
+        time_ns = int(time_ns)
+        self._f.write(struct.pack("<IIII", time_ns // 1000000000, time_ns % 1000000000, len(data), len(data)))
+        self._f.write(data)
+        self.frames += 1
+
+    def close(self):
+        self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class FrameTracker:
+    """ Matches the frames going into the DUT with the ones coming out, in order.
+
+    Frames are identified by a key (their bytes at the observed point). A frame
+    that comes out while older frames are still pending means those were dropped.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.sent = 0
+        self.received = 0
+        self.dropped = 0
+        self.unexpected = 0
+        self.errors = 0
+        self.latency = LatencyStats()
+        self._pending = collections.deque()
+
+    def frame_in(self, key, time_ns):
+        self.sent += 1
+        self._pending.append((bytes(key), time_ns))
+
+    def frame_out(self, key, time_ns, ok=True):
+        """ Record a frame out of the DUT. Returns its latency in ns, None if it wasn't sent. """
+        if not ok:
+            self.errors += 1
+        key = bytes(key)
+        for i, (pending_key, _) in enumerate(self._pending):
+            if pending_key == key:
+                break
+        else:
+            self.unexpected += 1
+            return None
+        for _ in range(i):
+            self._pending.popleft()
+            self.dropped += 1
+        _, time_in = self._pending.popleft()
+        self.received += 1
+        latency = time_ns - time_in
+        self.latency.add(latency)
+        return latency
+
+    def in_flight(self):
+        return len(self._pending)
+
+    def summary(self):
+        text = "%s: %d in, %d out, %d dropped, %d in flight, %d unexpected, %d errors" % (
+            self.name, self.sent, self.received, self.dropped, self.in_flight(), self.unexpected, self.errors)
+        if self.latency.count:
+            lat = self.latency
+            text += "; latency ns min %.0f avg %.0f p50 %.0f p99 %.0f max %.0f" % (
+                lat.percentile(0), lat.mean(), lat.percentile(0.5), lat.percentile(0.99), lat.percentile(1))
+        return text
+
+
+class ReplayConfig:
+    """ PCAP_* settings of a test """
+
+    def __init__(self, pcap_in=None, pcap_out=None, time_scale=1.0, max_frames=None):
+        self.pcap_in = pcap_in
+        self.pcap_out = pcap_out
+        self.time_scale = time_scale
+        self.max_frames = max_frames
+
+    @classmethod
+    def from_env(cls):
+        max_frames = os.getenv("PCAP_MAX_FRAMES", "")
+        return cls(pcap_in=os.getenv("PCAP_IN") or None,
+                   pcap_out=os.getenv("PCAP_OUT") or None,
+                   time_scale=float(os.getenv("PCAP_TIME_SCALE", "") or 1.0),
+                   max_frames=int(max_frames) if max_frames else None)
+
+
+async def replay(records, send, time_scale=1.0, max_frames=None):
+    """ Send records from a PcapReader with their capture timing.
+
+    send:        Coroutine function called with the frame bytes
+    time_scale:  Scale of the inter-frame timing, 0 for back to back
+
+    Returns the number of frames sent.
+    """
+    sim_start = get_sim_time("ns")
+    first_ns = None
+    sent = 0
+    for record in records:
+        if max_frames is not None and sent >= max_frames:
+            break
+        if first_ns is None:
+            first_ns = record.time_ns
+        if time_scale > 0:
+            delay = int(sim_start + (record.time_ns - first_ns) * time_scale - get_sim_time("ns"))
+            if delay > 0:
+                await Timer(delay, "ns")
+        await send(record.data)
+        sent += 1
+    return sent
+
+
+async def capture(recv, writer=None, tracker=None):
+    """ Write the frames returned by recv to a PcapWriter and/or a FrameTracker.
+
+    recv returns cocotbext.eth GmiiFrames, i.e. with preamble and FCS and with
+    sim_time_start/sim_time_end set. Runs until killed.
+    """
+    while True:
+        frame = await recv()
+        payload = frame.get_payload()
+        if writer is not None:
+            writer.write(steps_to_ns(frame.sim_time_start), payload)
+        if tracker is not None:
+            tracker.frame_out(payload, steps_to_ns(frame.sim_time_end), ok=frame.check_fcs())
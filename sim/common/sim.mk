@@ -0,0 +1,108 @@
+# Common simulation settings. Include before cocotb's Makefile.sim.
+mkfile_path := $(abspath $(lastword $(MAKEFILE_LIST)))
+SIM_COMMON_DIR := $(dir $(mkfile_path))
+
+# Python helpers shared by the testbenches
+export PYTHONPATH := $(SIM_COMMON_DIR):$(PYTHONPATH)
+
+##########################################################
+# Simulator
+#
+# SIM=ghdl (default) or SIM=nvc
+# Each simulator gets its own build directory so switching
+# between them never mixes up compiled libraries.
+##########################################################
+SIM ?= ghdl
+SIM_BUILD ?= sim_build_$(SIM)
+
+# Both simulators analyse the sources as VHDL-93
+ifeq ($(SIM),nvc)
+EXTRA_ARGS += --std=1993
+endif
+
+##########################################################
+# Waveforms
+#
+# Waveform dumping is off by default.
+# WAVES=1               Dump waves for the whole run
+#                       (wave.ghw for ghdl, wave.fst for nvc)
+# WAVE_SIGNALS=<file>   Only dump the signals listed in a
+#                       --read-wave-opt style file
+#
+# Windowed capture of single tests is done from cocotb,
+# see sim/common/waves.py (WAVE_TESTS, WAVE_WINDOW,
+# WAVE_TRIGGER).
+##########################################################
+WAVES ?= 0
+WAVE_SIGNALS ?=
+
+ifeq ($(WAVES),1)
+ifeq ($(SIM),nvc)
+SIM_ARGS += --wave=wave.fst
+ifneq ($(WAVE_SIGNALS),)
+# nvc takes the paths as --include globs with ':' separators
+WAVE_GLOBS := $(shell grep -v -e '^\s*\$$' -e '^\s*\#' $(WAVE_SIGNALS) | tr '/' ':')
+SIM_ARGS += $(foreach g,$(WAVE_GLOBS),--include=$(g))
+endif
+else
+SIM_ARGS += --wave=wave.ghw
+ifneq ($(WAVE_SIGNALS),)
+SIM_ARGS += --read-wave-opt=$(abspath $(WAVE_SIGNALS))
+endif
+endif
+endif
+
+ifneq ($(WAVE_SIGNALS),)
+export WAVE_SIGNALS := $(abspath $(WAVE_SIGNALS))
+endif
+export WAVE_TESTS WAVE_WINDOW WAVE_TRIGGER WAVE_HISTORY
+
+##########################################################
+# Profiling
+#
+# PROFILE=1             Record sim time per wall clock second
+#                       and trigger awaits per coroutine for
+#                       every test into results.xml
+# PROFILE=cprofile      Also run cProfile over each test
+#
+# See sim/common/sim_profile.py
+##########################################################
+PROFILE ?= 0
+ifneq ($(PROFILE),0)
+export SIM_PROFILE := 1
+endif
+ifeq ($(PROFILE),cprofile)
+export SIM_PROFILE_CPROFILE := 1
+endif
+export SIM_PROFILE_TOP
+
+##########################################################
+# PCAP replay (MAC testbenches)
+#
+# PCAP_IN=<file>        .pcap/.pcapng replayed into the RX side
+# PCAP_OUT=<file>       pcap of the frames the MAC transmits
+# PCAP_TIME_SCALE=<x>   Scale of the capture timing, 0 for
+#                       back to back frames. Default: 1
+# PCAP_MAX_FRAMES=<n>   Stop after n frames
+#
+# See sim/common/pcap.py
+##########################################################
+ifneq ($(PCAP_IN),)
+export PCAP_IN := $(abspath $(PCAP_IN))
+endif
+ifneq ($(PCAP_OUT),)
+export PCAP_OUT := $(abspath $(PCAP_OUT))
+endif
+export PCAP_TIME_SCALE PCAP_MAX_FRAMES
+
+##########################################################
+# Benchmarks (MAC testbenches, mac_*_benchmark tests)
+#
+# BENCH_FRAMES=<n>      Number of frames. Default: 20
+# BENCH_LEN=<n>         Frame length without FCS. Default: 0,
+#                       the random lengths of the MAC tests
+# BENCH_SEED=<n>        Seed of the random frame lengths
+#
+# See sim/common/bench.py and sim/common/mac_perf_model.py
+##########################################################
+export BENCH_FRAMES BENCH_LEN BENCH_SEED
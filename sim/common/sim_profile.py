@@ -0,0 +1,170 @@
+"""
+Opt-in profiling of the cocotb testbenches.
+
+Tells whether a slow test is simulator bound or Python testbench bound.
+Nothing is recorded unless SIM_PROFILE is set (PROFILE=1 from make, --profile
+from tests/run_all_tests.sh, --sim-profile from the pytest runner):
+
+    SIM_PROFILE             Record per test:
+                              - sim ns per wall clock second
+                              - trigger awaits per coroutine and trigger type
+    SIM_PROFILE_CPROFILE    Also run cProfile over the test. The stats are
+                            dumped to <test name>.prof and the functions with
+                            the most own time are added to the results.
+    SIM_PROFILE_TOP         Number of coroutines/functions reported. Default: 10
+
+Results are added as properties of the testsuite in results.xml, named
+"profile:<test name>:<metric>". tests/find_failures.py --profile prints them.
+"""
+import collections
+import cProfile
+import functools
+import logging
+import os
+import pstats
+import sys
+import time
+
+import cocotb
+from cocotb.triggers import Trigger
+from cocotb.utils import get_sim_time
+
+logger = logging.getLogger("cocotb.profile")
+
+PROPERTY_PREFIX = "profile"
+DEFAULT_TOP = 10
+
+
+def _env_enabled(name: str):
+    return os.getenv(name, "0").lower() not in ("", "0", "false", "no")
+
+
+def _coroutine_name(code):
+    name = getattr(code, "co_qualname", code.co_name)
+    return "%s:%d(%s)" % (os.path.basename(code.co_filename), code.co_firstlineno, name)
+
+
+class _AwaitCounter:
+    """ Counts trigger awaits by the awaiting coroutine.
+
+    Wraps __await__ of Trigger and of every Trigger subclass overriding it, the
+    caller of __await__ is the coroutine doing the await. Installed on first use
+    and left in place, it only counts while a profiler is running.
+    """
+    counts = None
+    _installed = False
+
+    @classmethod
+    def install(cls):
+        if cls._installed:
+            return
+        todo = [Trigger]
+        while todo:
+            trigger_cls = todo.pop()
+            todo += trigger_cls.__subclasses__()
+            if "__await__" in trigger_cls.__dict__:
+                trigger_cls.__await__ = cls._wrap(trigger_cls.__dict__["__await__"])
+        cls._installed = True
+
+    @classmethod
+    def _wrap(cls, orig_await):
+        @functools.wraps(orig_await)
+        def __await__(self):
+            if cls.counts is not None:
+                cls.counts[(sys._getframe(1).f_code, type(self).__name__)] += 1
+            return orig_await(self)
+        return __await__
+
+
+class SimProfiler:
+    """ Profiles one test.
+
+    cprofile_file:  Also run cProfile and dump the stats to this file
+    top:            Number of coroutines/functions reported
+    """
+
+    def __init__(self, test_name: str, cprofile_file=None, top=DEFAULT_TOP):
+        self.test_name = test_name
+        self.cprofile_file = cprofile_file
+        self.top = top
+        self.properties = {}
+        self._cprofile = None
+
+    @classmethod
+    def from_env(cls, test_name: str):
+        """ Build a profiler from the SIM_PROFILE* environment variables, None when disabled. """
+        cprofile = _env_enabled("SIM_PROFILE_CPROFILE")
+        if not (_env_enabled("SIM_PROFILE") or cprofile):
+            return None
+        return cls(test_name,
+                   cprofile_file=test_name + ".prof" if cprofile else None,
+                   top=int(os.getenv("SIM_PROFILE_TOP", "") or DEFAULT_TOP))
+
+    def start(self):
+        _AwaitCounter.install()
+        _AwaitCounter.counts = collections.Counter()
+        if self.cprofile_file:
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+        self._sim_start = get_sim_time("ns")
+        self._wall_start = time.perf_counter()
+
+    def stop(self):
+        wall_s = time.perf_counter() - self._wall_start
+        sim_ns = get_sim_time("ns") - self._sim_start
+        if self._cprofile:
+            self._cprofile.disable()
+        counts = _AwaitCounter.counts
+        _AwaitCounter.counts = None
+
+        self.properties["sim_ns"] = "%d" % (sim_ns)
+        self.properties["wall_s"] = "%.3f" % (wall_s)
+        self.properties["sim_ns_per_s"] = "%.1f" % (sim_ns / wall_s if wall_s else 0)
+        self.properties["awaits_total"] = "%d" % (sum(counts.values()))
+        for (code, trigger), count in counts.most_common(self.top):
+            self.properties["awaits[%s %s]" % (_coroutine_name(code), trigger)] = "%d" % (count)
+
+        if self._cprofile:
+            self._cprofile.dump_stats(self.cprofile_file)
+            self.properties["cprofile_file"] = os.path.abspath(self.cprofile_file)
+            stats = pstats.Stats(self._cprofile).stats
+            by_own_time = sorted(stats.items(), key=lambda item: item[1][2], reverse=True)
+            for (filename, line, func), (_, ncalls, tottime, _, _) in by_own_time[:self.top]:
+                name = "%s:%d(%s)" % (os.path.basename(filename), line, func)
+                self.properties["cprofile[%s]" % (name)] = "%.4fs %d calls" % (tottime, ncalls)
+
+        self.write_properties()
+        logger.info("%s: %s sim ns per wall second, %s trigger awaits", self.test_name,
+                    self.properties["sim_ns_per_s"], self.properties["awaits_total"])
+
+    def write_properties(self):
+        """ Add the results as properties to the xunit results of the regression """
+        regression_manager = getattr(cocotb, "regression_manager", None)
+        if regression_manager is None:
+            return
+        for metric, value in self.properties.items():
+            name = "%s:%s:%s" % (PROPERTY_PREFIX, self.test_name, metric)
+            regression_manager.xunit.add_property(name=name, value=value)
+
+
+def profile_sim(test_func):
+    """ Test decorator that profiles the test when enabled from the environment.
+
+    Place it under @cocotb.test() (and @capture_waves):
+
+        @cocotb.test()
+        @capture_waves
+        @profile_sim
+        async def my_test(dut):
+    """
+    @functools.wraps(test_func)
+    async def wrapper(dut, *args, **kwargs):
+        profiler = SimProfiler.from_env(test_func.__name__)
+        if profiler is None:
+            return await test_func(dut, *args, **kwargs)
+        profiler.start()
+        try:
+            return await test_func(dut, *args, **kwargs)
+        finally:
+            profiler.stop()
+    return wrapper
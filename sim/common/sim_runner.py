@@ -0,0 +1,92 @@
+"""
+Build and run the cocotb testbenches from pytest with cocotb's Python runner.
+
+The Makefiles run one fixed configuration of a testbench. The runner lets a
+test_*.py next to a testbench sweep the tb generics instead, each combination
+as its own pytest job with its own build directory, so the jobs can run in
+parallel with pytest-xdist:
+
+    cd sim && pytest -n auto
+
+The simulator is taken from SIM (ghdl by default) like the Makefiles. Every
+generic is also exported to the cocotb test as TB_<generic> since the
+generics of the toplevel can't be read back through every simulator's
+interface.
+"""
+import os
+import re
+import sys
+from pathlib import Path
+
+from cocotb.runner import get_runner
+
+SIM_DIR = Path(__file__).resolve().parent.parent
+HDL_DIR = SIM_DIR.parent / "hdl"
+
+# Build dir per simulator, matches sim/common/sim.mk
+BUILD_DIR_FMT = "sim_build_{sim}"
+
+# Extra analysis args per simulator, matches sim/common/sim.mk
+BUILD_ARGS = {
+    "nvc": ["--std=1993"],
+}
+
+_SOURCE_RE = re.compile(r"^\s*\$\(PREFIX\)(\S+\.vhdl?)")
+
+
+def lib_sources(lib: str):
+    """ Source files of an hdl/<lib> library in the order listed in its sources.mk """
+    lib_dir = HDL_DIR / lib
+    sources = []
+    with open(lib_dir / "sources.mk") as f:
+        for line in f:
+            m = _SOURCE_RE.match(line)
+            if m:
+                sources.append(lib_dir / m.group(1))
+    return sources
+
+
+def job_name(parameters: dict, extra_env: dict = None):
+    """ Build directory name for one parameter combination """
+    items = list(parameters.items()) + list((extra_env or {}).items())
+    if not items:
+        return "default"
+    return "-".join("%s_%s" % (k, v) for k, v in items)
+
+
+def run_tb(tb_dir, test_module: str, libs, parameters: dict = None, extra_env: dict = None,
+           testcase=None, toplevel: str = "tb", sim: str = None):
+    """ Build the hdl libraries and tb.vhd of tb_dir and run test_module against it.
+
+    tb_dir:      Testbench directory, holding tb.vhd
+    libs:        hdl libraries needed by the tb, in analysis order, e.g. ("comp", "mac")
+    parameters:  Generics of the tb toplevel
+    extra_env:   Extra environment for the cocotb tests. Part of the build dir name.
+    testcase:    Test name(s) to run, all tests in test_module by default
+
+    Returns the path of the results xml file.
+    """
+    parameters = parameters or {}
+    extra_env = extra_env or {}
+    sim = sim or os.getenv("SIM", "ghdl")
+    tb_dir = Path(tb_dir)
+    build_dir = tb_dir / BUILD_DIR_FMT.format(sim=sim) / job_name(parameters, extra_env)
+    build_args = BUILD_ARGS.get(sim, [])
+
+    runner = get_runner(sim)
+    for lib in libs:
+        runner.build(hdl_library=lib.upper(), vhdl_sources=lib_sources(lib),
+                     build_dir=build_dir, build_args=build_args)
+    runner.build(vhdl_sources=[tb_dir / "tb.vhd"], hdl_toplevel=toplevel,
+                 build_dir=build_dir, build_args=build_args)
+
+    env = dict(extra_env)
+    env.update({"TB_%s" % (k): str(v) for k, v in parameters.items()})
+    # The runner hands sys.path to the simulator as PYTHONPATH. Put this tb
+    # first, several testbenches have a test module of the same name.
+    sys.path.insert(0, str(tb_dir))
+    try:
+        return runner.test(test_module=test_module, hdl_toplevel=toplevel, parameters=parameters,
+                    extra_env=env, testcase=testcase, build_dir=build_dir)
+    finally:
+        sys.path.remove(str(tb_dir))
@@ -0,0 +1,32 @@
+"""
+Latency statistics shared by the frame trackers of the testbenches
+(pcap.FrameTracker) and the MAC performance model (mac_perf_model).
+"""
+import collections
+
+
+class LatencyStats:
+    """ Latency histogram with 1ns bins, cheap to fill with millions of frames """
+
+    def __init__(self):
+        self.hist = collections.Counter()
+
+    def add(self, latency_ns):
+        self.hist[int(round(latency_ns))] += 1
+
+    @property
+    def count(self):
+        return sum(self.hist.values())
+
+    def percentile(self, p):
+        target = min(self.count - 1, int(p * self.count))
+        seen = 0
+        for latency_ns in sorted(self.hist):
+            seen += self.hist[latency_ns]
+            if seen > target:
+                return latency_ns
+        return None
+
+    def mean(self):
+        count = self.count
+        return sum(ns * n for ns, n in self.hist.items()) / count if count else None
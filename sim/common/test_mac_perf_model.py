@@ -0,0 +1,59 @@
+# Checks of the MAC performance model on its own, no simulator needed.
+# The calibration against the testbenches is in mac_*_phy/test_mac_*_perf.py.
+# Run from sim/ with: pytest common
+import time
+
+import pytest
+
+from mac_perf_model import (PHYS, FCS_SIZE, INTER_PKT_GAP_SIZE, START_SEQ_SIZE, SYS_CLK_NS, UDP_FRAME_LEN,
+                            RxModel, TxModel, frame_lengths, offered_load, saturated)
+
+
+def line_rate_mbps(phy, length):
+    """ Frame bits per us at the line rate, with preamble and gap on the wire """
+    wire_bytes = START_SEQ_SIZE + length + FCS_SIZE + INTER_PKT_GAP_SIZE
+    return (length + FCS_SIZE) * 8 * 1e3 / (wire_bytes * PHYS[phy].byte_ns)
+
+
+@pytest.mark.parametrize("phy", sorted(PHYS))
+@pytest.mark.parametrize("length", [60, 256, UDP_FRAME_LEN, 1514])
+def test_tx_below_line_rate(phy, length):
+    for pipes in (1, 2, 3):
+        result = TxModel(pipes, phy).run(saturated(frame_lengths(1000, length)))
+        assert result.frames == 1000
+        assert result.throughput_mbps() < line_rate_mbps(phy, length)
+
+
+def test_tx_pipes():
+    # Short frames are built faster than they are sent, one pipe keeps up
+    results = [TxModel(pipes).run(saturated(frame_lengths(1000, 256))) for pipes in (1, 2, 3)]
+    assert len(set(r.throughput_mbps() for r in results)) == 1
+    # Long frames with one pipe wait for the previous frame to leave the pipe
+    one, two = [TxModel(pipes).run(saturated(frame_lengths(1000, 1514))) for pipes in (1, 2)]
+    assert one.throughput_mbps() < two.throughput_mbps()
+    assert two.throughput_mbps() > 0.95 * line_rate_mbps("mii", 1514)
+
+
+def test_tx_offered_load():
+    result = TxModel(2).run(offered_load(frame_lengths(1000, 512), 0.5))
+    assert result.throughput_mbps() == pytest.approx(0.5 * line_rate_mbps("mii", 512), rel=0.01)
+    # No queueing at half the line rate, only the arrivals' clock alignment
+    assert result.latency.percentile(1) - result.latency.percentile(0) <= SYS_CLK_NS
+
+
+def test_rx_drops():
+    # Frames of one length come out faster than they arrive
+    for length in (60, 1514):
+        assert RxModel().run(saturated(frame_lengths(1000, length))).dropped == 0
+    # A short frame right behind a long one passes its FCS check while the
+    # long one is still streamed out of the pkt_buffer
+    result = RxModel().run(saturated([1514, 60, 1514]))
+    assert (result.frames, result.dropped) == (2, 1)
+
+
+def test_million_frames(record_property):
+    # The run time depends on the machine, it is reported instead of checked
+    start = time.perf_counter()
+    result = TxModel(3).run(saturated(frame_lengths(1000000, seed=1)))
+    record_property("run_time_s", round(time.perf_counter() - start, 2))
+    assert result.frames == 1000000
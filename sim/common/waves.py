@@ -0,0 +1,270 @@
+"""
+Opt-in, per test waveform capture for the cocotb testbenches.
+
+Full run dumps are left to the simulator (WAVES=1, see sim/common/sim.mk).
+This module records a VCD of a subset of signals from within cocotb so a
+single test, a slice of sim time or the moments leading up to a failure can
+be looked at without dumping the whole regression. Nothing is recorded unless
+one of the following environment variables is set:
+
+    WAVE_TESTS      Comma separated names of the tests to capture. Default: all
+    WAVE_SIGNALS    --read-wave-opt style file listing the signals to record.
+                    Default: all signals at the top level of the testbench
+    WAVE_WINDOW     Sim time window to record as "<start>:<end>", e.g.
+                    "10us:25us". Times without units are in ns. Either side
+                    may be left empty.
+    WAVE_TRIGGER    "fail" to only write the waves when the test fails
+    WAVE_HISTORY    Sim time kept before a failure. Default: 20us
+
+Waves are written to <test name>.vcd in the simulation directory.
+"""
+import collections
+import fnmatch
+import functools
+import logging
+import os
+
+import cocotb
+from cocotb.binary import BinaryValue
+from cocotb.handle import HierarchyObject, HierarchyArrayObject, ModifiableObject
+from cocotb.triggers import Edge
+from cocotb.utils import get_sim_time
+
+logger = logging.getLogger("cocotb.waves")
+
+TRIGGER_FAIL = "fail"
+DEFAULT_HISTORY = "20us"
+
+_TIME_UNITS = {"fs": 1e-3, "ps": 1, "ns": 1e3, "us": 1e6, "ms": 1e9}
+_VCD_VALUES = {"0": "0", "1": "1", "L": "0", "H": "1", "Z": "z"}
+
+
+def parse_time(text: str, default_units="ns"):
+    """ Convert a time string such as '150', '20us' or '1.5ms' to ps. """
+    text = text.strip().lower()
+    for units, scale in _TIME_UNITS.items():
+        if text.endswith(units):
+            return int(float(text[:-len(units)]) * scale)
+    return int(float(text) * _TIME_UNITS[default_units])
+
+
+def parse_window(text: str):
+    """ Parse a '<start>:<end>' window. Returns (start_ps, end_ps), end may be None. """
+    start, _, end = text.partition(":")
+    start_ps = parse_time(start) if start.strip() else 0
+    end_ps = parse_time(end) if end.strip() else None
+    return start_ps, end_ps
+
+
+def read_wave_opt(filename: str):
+    """ Read signal paths from a GHDL --read-wave-opt file. """
+    paths = []
+    with open(filename) as f:
+        for line in f:
+            line = line.strip()
+            # '$ version' header and '#' comments
+            if not line or line.startswith("$") or line.startswith("#"):
+                continue
+            paths.append(line)
+    return paths
+
+
+def _is_logic_signal(handle):
+    return isinstance(handle, ModifiableObject) and isinstance(handle.value, BinaryValue)
+
+
+def _signals_in(handle):
+    """ All logic signals directly inside a hierarchy handle. """
+    return [h for h in handle if _is_logic_signal(h)]
+
+
+def resolve_signals(dut, paths):
+    """ Resolve wave-opt style paths ('/tb/inst/*') to signal handles. """
+    signals = {}
+    for path in paths:
+        parts = [p for p in path.split("/") if p]
+        if not parts or not fnmatch.fnmatch(dut._name.lower(), parts[0].lower()):
+            logger.warning("Wave signal path '%s' is not under '%s'", path, dut._name)
+            continue
+        handles = [dut]
+        for part in parts[1:]:
+            matched = []
+            for handle in handles:
+                if not isinstance(handle, (HierarchyObject, HierarchyArrayObject)):
+                    continue
+                if any(c in part for c in "*?["):
+                    matched += [h for h in handle if fnmatch.fnmatch(h._name.lower(), part.lower())]
+                else:
+                    try:
+                        matched.append(handle._id(part, extended=False))
+                    except AttributeError:
+                        pass
+            handles = matched
+        if not handles:
+            logger.warning("Wave signal path '%s' matched nothing", path)
+        for handle in handles:
+            found = [handle] if _is_logic_signal(handle) else _signals_in(handle)
+            for sig in found:
+                signals[sig._path] = sig
+    return list(signals.values())
+
+
+def _vcd_value(value: BinaryValue, width: int):
+    bits = "".join(_VCD_VALUES.get(c, "x") for c in value.binstr.upper())
+    return bits if width == 1 else "b" + bits + " "
+
+
+class WaveRecorder:
+    """ Records value changes of a set of signals and writes them to a VCD file.
+
+    window_ps:   (start, end) sim time window, end may be None
+    history_ps:  Only keep this much history (trigger mode)
+    on_fail:     Only write the file if the test failed
+    """
+
+    def __init__(self, signals, filename, window_ps=(0, None), history_ps=None, on_fail=False):
+        self.signals = signals
+        self.filename = filename
+        self.window_start, self.window_end = window_ps
+        self.history_ps = history_ps
+        self.on_fail = on_fail
+        self._ids = {sig._path: self._vcd_id(i) for i, sig in enumerate(signals)}
+        # Signal values at the start of the recorded events
+        self._baseline = {}
+        self._baseline_time = 0
+        self._events = collections.deque()
+        self._tasks = []
+
+    @classmethod
+    def from_env(cls, dut, test_name: str):
+        """ Build a recorder from the WAVE_* environment variables, None when disabled. """
+        tests = os.getenv("WAVE_TESTS", "")
+        window = os.getenv("WAVE_WINDOW", "")
+        trigger = os.getenv("WAVE_TRIGGER", "").lower()
+        if not (tests or window or trigger):
+            return None
+        if tests and test_name not in [t.strip() for t in tests.split(",")]:
+            return None
+
+        sig_file = os.getenv("WAVE_SIGNALS", "")
+        if sig_file:
+            signals = resolve_signals(dut, read_wave_opt(sig_file))
+        else:
+            signals = _signals_in(dut)
+
+        on_fail = trigger == TRIGGER_FAIL
+        history_ps = parse_time(os.getenv("WAVE_HISTORY", "") or DEFAULT_HISTORY) if on_fail else None
+        return cls(signals, test_name + ".vcd",
+                   window_ps=parse_window(window) if window else (0, None),
+                   history_ps=history_ps,
+                   on_fail=on_fail)
+
+    @staticmethod
+    def _vcd_id(index: int):
+        chars = []
+        while True:
+            index, rem = divmod(index, 94)
+            chars.append(chr(33 + rem))
+            if index == 0:
+                return "".join(chars)
+
+    def start(self):
+        now = get_sim_time("ps")
+        self._baseline_time = max(now, self.window_start)
+        for sig in self.signals:
+            self._baseline[sig._path] = _vcd_value(sig.value, len(sig))
+            self._tasks.append(cocotb.start_soon(self._watch(sig)))
+
+    def stop(self, failed: bool):
+        for task in self._tasks:
+            task.kill()
+        self._tasks = []
+        if failed or not self.on_fail:
+            self.write()
+
+    async def _watch(self, sig):
+        path = sig._path
+        width = len(sig)
+        while True:
+            await Edge(sig)
+            now = get_sim_time("ps")
+            if self.window_end is not None and now > self.window_end:
+                return
+            self._events.append((now, path, _vcd_value(sig.value, width)))
+            self._prune(now)
+
+    def _prune(self, now):
+        """ Fold events outside of the window / history into the baseline. """
+        horizon = self.window_start
+        if self.history_ps is not None:
+            horizon = max(horizon, now - self.history_ps)
+        while self._events and self._events[0][0] < horizon:
+            _, path, value = self._events.popleft()
+            self._baseline[path] = value
+            self._baseline_time = horizon
+
+    def write(self):
+        """ Write the recorded changes to self.filename """
+        with open(self.filename, "w") as f:
+            f.write("$timescale 1ps $end\n")
+            self._write_scopes(f)
+            f.write("$enddefinitions $end\n")
+            f.write("#%d\n$dumpvars\n" % (self._baseline_time))
+            for path, value in self._baseline.items():
+                f.write(value + self._ids[path] + "\n")
+            f.write("$end\n")
+            last_time = self._baseline_time
+            for time, path, value in self._events:
+                if time != last_time:
+                    f.write("#%d\n" % (time))
+                    last_time = time
+                f.write(value + self._ids[path] + "\n")
+        logger.info("Wrote %d signals to %s", len(self.signals), self.filename)
+
+    def _write_scopes(self, f):
+        tree = {}
+        for sig in self.signals:
+            node = tree
+            for scope in sig._path.split(".")[:-1]:
+                node = node.setdefault(scope, {})
+            node.setdefault(None, []).append(sig)
+
+        def write_node(name, node):
+            f.write("$scope module %s $end\n" % (name))
+            for sig in node.get(None, []):
+                f.write("$var wire %d %s %s $end\n" % (len(sig), self._ids[sig._path], sig._name))
+            for child, child_node in node.items():
+                if child is not None:
+                    write_node(child, child_node)
+            f.write("$upscope $end\n")
+
+        for name, node in tree.items():
+            if name is not None:
+                write_node(name, node)
+
+
+def capture_waves(test_func):
+    """ Test decorator that captures waves for the test when enabled from the environment.
+
+    Place it under @cocotb.test():
+
+        @cocotb.test()
+        @capture_waves
+        async def my_test(dut):
+    """
+    @functools.wraps(test_func)
+    async def wrapper(dut, *args, **kwargs):
+        recorder = WaveRecorder.from_env(dut, test_func.__name__)
+        if recorder is None:
+            return await test_func(dut, *args, **kwargs)
+        recorder.start()
+        failed = True
+        try:
+            result = await test_func(dut, *args, **kwargs)
+            failed = False
+            return result
+        finally:
+            # A failing background coroutine closes the test, which lands here
+            # with failed still set.
+            recorder.stop(failed)
+    return wrapper
@@ -0,0 +1,36 @@
+# pytest setup for the cocotb runner tests (test_*.py in each sim dir)
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+# Python helpers shared by the testbenches (sim_runner, waves, sim_profile)
+sys.path.insert(0, str(Path(__file__).resolve().parent / "common"))
+
+
+def pytest_addoption(parser):
+    parser.addoption("--sim-profile", action="store_true",
+                     help="Profile the cocotb tests, see sim/common/sim_profile.py")
+    parser.addoption("--sim-cprofile", action="store_true",
+                     help="Profile the cocotb tests and also run cProfile over them")
+    parser.addoption("--perf-calibration", action="store_true",
+                     help="Also run the tests checking mac_perf_model against the benchmark tests")
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "calibration: mac_perf_model vs. benchmark sweep, needs --perf-calibration")
+    # The runner passes the environment on to the simulator
+    if config.getoption("--sim-profile") or config.getoption("--sim-cprofile"):
+        os.environ["SIM_PROFILE"] = "1"
+    if config.getoption("--sim-cprofile"):
+        os.environ["SIM_PROFILE_CPROFILE"] = "1"
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("--perf-calibration"):
+        return
+    skip = pytest.mark.skip(reason="needs --perf-calibration")
+    for item in items:
+        if "calibration" in item.keywords:
+            item.add_marker(skip)
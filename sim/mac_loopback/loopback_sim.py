@@ -0,0 +1,129 @@
+import os
+import random
+import struct
+import zlib
+
+import cocotb
+from cocotb.clock import Clock
+from cocotb.triggers import RisingEdge, Timer
+from cocotbext.axi import (AxiStreamBus, AxiStreamSource, AxiStreamSink, AxiStreamMonitor, AxiStreamFrame)
+from cocotbext.axi import AxiLiteBus, AxiLiteMaster
+from waves import capture_waves
+from sim_profile import profile_sim
+from pcap import FrameTracker, steps_to_ns
+from bench import BenchConfig, record
+from mac_perf_model import PHYS, PerfResult, FCS_SIZE, SYS_CLK_NS
+
+# MAC_registers MAC control register, bits 1:0 loopback mode (LOOPBACK_* in MAC_pack)
+REG_MAC_CTRL    = 0x1C
+LOOPBACK_NONE   = 0b00
+LOOPBACK_MAC    = 0b01
+LOOPBACK_PHY    = 0b10
+
+# udp_traffic_gen row payload
+ROW_LEN = 1280
+
+# PHY generic of the tb
+PHY = os.getenv("TB_PHY", "MII")
+LINE_RATE_MBPS = 8e3 / PHYS[PHY.lower()].byte_ns
+
+
+def fcs_ok(data):
+    """ data ends with its FCS """
+    return struct.pack("<I", zlib.crc32(bytes(data[:-FCS_SIZE]))) == bytes(data[-FCS_SIZE:])
+
+
+async def setup(dut):
+    cocotb.start_soon(Clock(dut.clk, SYS_CLK_NS, units="ns").start())
+    # No link partner, only the clocks of the PHY interface
+    cocotb.start_soon(Clock(dut.mii_tx_clk, 40, units="ns").start())
+    cocotb.start_soon(Clock(dut.mii_rx_clk, 40, units="ns").start())
+    cocotb.start_soon(Clock(dut.rmii_clk, 20, units="ns").start())
+
+    dut.send_pkt.value = 0
+    dut.rst_cur_row.value = 0
+    dut.rst.value = 1
+    for _ in range(5):
+        await RisingEdge(dut.clk)
+    dut.rst.value = 0
+    await RisingEdge(dut.clk)
+
+# Send BENCH_FRAMES udp_traffic_gen frames through the MAC looped back in mode,
+# check every frame comes back with a good FCS and record the throughput and
+# latency (TX AXIS in -> RX AXIS out), see sim/common/bench.py
+async def run_loopback(dut, name, mode):
+    config = BenchConfig.from_env()
+    await setup(dut)
+
+    axil = AxiLiteMaster(AxiLiteBus.from_prefix(dut, "s_axi"), dut.clk, dut.rst)
+    pix_source = AxiStreamSource(AxiStreamBus.from_prefix(dut, "pix_axis"), dut.clk, dut.rst)
+    tx_monitor = AxiStreamMonitor(AxiStreamBus.from_prefix(dut, "tx_s_axis"), dut.clk, dut.rst)
+    axis_sink = AxiStreamSink(AxiStreamBus.from_prefix(dut, "rx_m_axis"), dut.clk, dut.rst)
+
+    await axil.write_dword(REG_MAC_CTRL, mode)
+    assert await axil.read_dword(REG_MAC_CTRL) == mode
+
+    loop = FrameTracker("%s loopback (TX AXIS in -> RX AXIS out)" % (name))
+    result = PerfResult(loop.name)
+
+    async def receive():
+        while True:
+            frame = await axis_sink.recv()
+            time_out = steps_to_ns(frame.sim_time_end)
+            # The received frame ends with the FCS the TX pipeline added
+            latency = loop.frame_out(frame.tdata[:-FCS_SIZE], time_out, ok=fcs_ok(frame.tdata))
+            if latency is not None:
+                result.add(time_out - latency, time_out, len(frame.tdata))
+
+    receive_task = cocotb.start_soon(receive())
+
+    # Pixel data for every row, the generator takes it as it needs it
+    await pix_source.send(AxiStreamFrame(bytes(random.randrange(256) for _ in range((config.frames + 1) * ROW_LEN))))
+
+    # Start the next frame as soon as the generator is done with the last one
+    tx_bytes = 0
+    tx_start_ns = None
+    for _ in range(config.frames):
+        dut.send_pkt.value = 1
+        await RisingEdge(dut.clk)
+        dut.send_pkt.value = 0
+        frame = await tx_monitor.recv()
+        loop.frame_in(frame.tdata, steps_to_ns(frame.sim_time_start))
+        if tx_start_ns is None:
+            tx_start_ns = steps_to_ns(frame.sim_time_start)
+        tx_bytes += len(frame.tdata) + FCS_SIZE
+    tx_done_ns = steps_to_ns(frame.sim_time_end)
+
+    # Let the last frames come back, give up after 200us without progress
+    progress = None
+    while loop.in_flight() and progress != loop.received:
+        progress = loop.received
+        await Timer(200, 'us')
+    receive_task.kill()
+    result.dropped = loop.dropped + loop.in_flight()
+    await axil.write_dword(REG_MAC_CTRL, LOOPBACK_NONE)
+
+    record(name, result)
+    dut._log.info(loop.summary())
+    dut._log.info("TX in: %.2f Mbit/s, RX out: %.2f Mbit/s",
+                  tx_bytes * 8 * 1e3 / (tx_done_ns - tx_start_ns), result.throughput_mbps())
+    assert loop.received == config.frames, "Frames were lost in the loopback"
+    assert loop.errors == 0, "Frames came back with a bad FCS"
+    return result
+
+# TX pipeline output straight into the RX pipeline, in the sys clk domain
+@cocotb.test()
+@capture_waves
+@profile_sim
+async def mac_loopback_mac(dut):
+    result = await run_loopback(dut, "mac_loopback_mac", LOOPBACK_MAC)
+    # Not bound by the PHY line rate
+    assert result.throughput_mbps() > LINE_RATE_MBPS
+
+# Looped back at the PHY interface pins, MII nibbles / RMII dibits
+@cocotb.test()
+@capture_waves
+@profile_sim
+async def mac_loopback_phy(dut):
+    result = await run_loopback(dut, "mac_loopback_phy", LOOPBACK_PHY)
+    assert result.throughput_mbps() < LINE_RATE_MBPS
@@ -0,0 +1,219 @@
+library ieee;
+use ieee.std_logic_1164.all;
+use ieee.numeric_std.all;
+
+library mac;
+library mdio;
+library nic;
+
+-- udp_traffic_gen feeding a MAC in loopback, PHY selects MAC_MII or MAC_RMII
+entity tb is
+    generic (
+        PHY             : string := "MII";
+        TX_UNFOLD_CNT   : natural := 2
+    );
+end entity tb;
+
+architecture rtl of tb is
+    signal clk                     : std_logic;
+    signal rst                     : std_logic;
+    ---------------------------------------
+    -- UDP traffic generator
+    ---------------------------------------
+    signal send_pkt                : std_logic;
+    signal rst_cur_row             : std_logic;
+    signal pix_axis_tdata          : std_logic_vector(7 downto 0);
+    signal pix_axis_tvalid         : std_logic;
+    signal pix_axis_tready         : std_logic;
+    ---------------------------------------
+    -- AXI RX Data Stream
+    ---------------------------------------
+    signal rx_m_axis_tdata         : std_logic_vector(7 downto 0);
+    signal rx_m_axis_tstrb         : std_logic_vector(0 downto 0);
+    signal rx_m_axis_tvalid        : std_logic;
+    signal rx_m_axis_tready        : std_logic;
+    signal rx_m_axis_tlast         : std_logic;
+    signal rx_m_axis_tuser         : std_logic_vector(31 downto 0);
+    ---------------------------------------
+    -- AXI TX Data Stream
+    ---------------------------------------
+    signal tx_s_axis_tdata         : std_logic_vector(7 downto 0);
+    signal tx_s_axis_tstrb         : std_logic_vector(0 downto 0);
+    signal tx_s_axis_tvalid        : std_logic;
+    signal tx_s_axis_tready        : std_logic;
+    signal tx_s_axis_tlast         : std_logic;
+    ---------------------------------------
+    -- PHY clocks, no link partner
+    ---------------------------------------
+    signal mii_tx_clk              : std_logic;
+    signal mii_rx_clk              : std_logic;
+    signal rmii_clk                : std_logic;
+    ---------------------------------------
+    -- Timestamps / MAC control
+    ---------------------------------------
+    signal timestamp               : std_logic_vector(mac.MAC_pack.TIMESTAMP_WIDTH - 1 downto 0);
+    signal tx_ts_data              : std_logic_vector(mac.MAC_pack.TIMESTAMP_WIDTH - 1 downto 0);
+    signal tx_ts_empty             : std_logic;
+    signal tx_ts_rd_en             : std_logic;
+    signal loopback_mode           : std_logic_vector(1 downto 0);
+    ---------------------------------------
+    -- AXI lite registers
+    ---------------------------------------
+    signal s_axi_aresetn           : std_logic;
+    signal s_axi_awaddr            : std_logic_vector(31 downto 0);
+    signal s_axi_awvalid           : std_logic;
+    signal s_axi_awready           : std_logic;
+    signal s_axi_wdata             : std_logic_vector(31 downto 0);
+    signal s_axi_wstrb             : std_logic_vector(3 downto 0);
+    signal s_axi_wvalid            : std_logic;
+    signal s_axi_wready            : std_logic;
+    signal s_axi_bresp             : std_logic_vector(1 downto 0);
+    signal s_axi_bvalid            : std_logic;
+    signal s_axi_bready            : std_logic;
+    signal s_axi_araddr            : std_logic_vector(31 downto 0);
+    signal s_axi_arvalid           : std_logic;
+    signal s_axi_arready           : std_logic;
+    signal s_axi_rdata             : std_logic_vector(31 downto 0);
+    signal s_axi_rresp             : std_logic_vector(1 downto 0);
+    signal s_axi_rvalid            : std_logic;
+    signal s_axi_rready            : std_logic;
+begin
+
+    udp_traffic_gen_inst : entity nic.udp_traffic_gen(rtl)
+    port map (
+        clk                 => clk,
+        rst                 => rst,
+        send_pkt            => send_pkt,
+        rst_cur_row         => rst_cur_row,
+        -- Pixel data in
+        s_axis_tdata        => pix_axis_tdata,
+        s_axis_tvalid       => pix_axis_tvalid,
+        s_axis_tready       => pix_axis_tready,
+        -- UDP pkt out
+        m_axis_tdata        => tx_s_axis_tdata,
+        m_axis_tstrb        => tx_s_axis_tstrb,
+        m_axis_tvalid       => tx_s_axis_tvalid,
+        m_axis_tready       => tx_s_axis_tready,
+        m_axis_tlast        => tx_s_axis_tlast
+    );
+
+    gen_mii : if PHY = "MII" generate
+        mac_inst : entity mac.MAC_MII(rtl)
+        generic map (
+            TX_UNFOLD_CNT           => TX_UNFOLD_CNT
+        ) port map (
+            clk                     => clk,
+            rst                     => rst,
+            -- AXI RX Data Stream
+            rx_m_axis_tdata         => rx_m_axis_tdata,
+            rx_m_axis_tstrb         => rx_m_axis_tstrb,
+            rx_m_axis_tvalid        => rx_m_axis_tvalid,
+            rx_m_axis_tready        => rx_m_axis_tready,
+            rx_m_axis_tlast         => rx_m_axis_tlast,
+            rx_m_axis_tuser         => rx_m_axis_tuser,
+            -- AXI TX Data Stream
+            tx_s_axis_tdata         => tx_s_axis_tdata,
+            tx_s_axis_tstrb         => tx_s_axis_tstrb,
+            tx_s_axis_tvalid        => tx_s_axis_tvalid,
+            tx_s_axis_tready        => tx_s_axis_tready,
+            tx_s_axis_tlast         => tx_s_axis_tlast,
+            -- Timestamps
+            timestamp_out           => timestamp,
+            tx_ts_data              => tx_ts_data,
+            tx_ts_empty             => tx_ts_empty,
+            tx_ts_rd_en             => tx_ts_rd_en,
+            loopback_mode           => loopback_mode,
+            -- MII PHY interface
+            mii_tx_clk              => mii_tx_clk,
+            mii_tx_en               => open,
+            mii_tx_er               => open,
+            mii_tx_data             => open,
+            mii_rx_clk              => mii_rx_clk,
+            mii_rx_en               => '0',
+            mii_rx_er               => '0',
+            mii_rx_data             => (others => '0'),
+            mii_rst_phy             => open
+        );
+    end generate gen_mii;
+
+    gen_rmii : if PHY = "RMII" generate
+        mac_inst : entity mac.MAC_RMII(rtl)
+        generic map (
+            TX_UNFOLD_CNT           => TX_UNFOLD_CNT
+        ) port map (
+            clk                     => clk,
+            rst                     => rst,
+            -- AXI RX Data Stream
+            rx_m_axis_tdata         => rx_m_axis_tdata,
+            rx_m_axis_tstrb         => rx_m_axis_tstrb,
+            rx_m_axis_tvalid        => rx_m_axis_tvalid,
+            rx_m_axis_tready        => rx_m_axis_tready,
+            rx_m_axis_tlast         => rx_m_axis_tlast,
+            rx_m_axis_tuser         => rx_m_axis_tuser,
+            -- AXI TX Data Stream
+            tx_s_axis_tdata         => tx_s_axis_tdata,
+            tx_s_axis_tstrb         => tx_s_axis_tstrb,
+            tx_s_axis_tvalid        => tx_s_axis_tvalid,
+            tx_s_axis_tready        => tx_s_axis_tready,
+            tx_s_axis_tlast         => tx_s_axis_tlast,
+            -- Timestamps
+            timestamp_out           => timestamp,
+            tx_ts_data              => tx_ts_data,
+            tx_ts_empty             => tx_ts_empty,
+            tx_ts_rd_en             => tx_ts_rd_en,
+            loopback_mode           => loopback_mode,
+            -- RMII PHY interface
+            rmii_clk                => rmii_clk,
+            rmii_tx_en              => open,
+            rmii_tx_data            => open,
+            rmii_rx_data            => (others => '0'),
+            rmii_crs_dv             => '0',
+            rmii_rx_er              => '0'
+        );
+    end generate gen_rmii;
+
+    s_axi_aresetn <= not rst;
+
+    mac_registers_inst : entity mdio.MAC_registers(rtl)
+    generic map (
+        TIMESTAMP_WIDTH     => mac.MAC_pack.TIMESTAMP_WIDTH
+    ) port map (
+        clk                 => clk,
+        rstn                => s_axi_aresetn,
+        -- MDIO
+        mdio_phy_addr       => open,
+        mdio_reg_addr       => open,
+        mdio_data_out       => open,
+        mdio_write          => open,
+        mdio_start          => open,
+        mdio_data_in        => (others => '0'),
+        mdio_din_valid      => '0',
+        mdio_busy_in        => '0',
+        -- Timestamps
+        timestamp_in        => timestamp,
+        tx_ts_data_in       => tx_ts_data,
+        tx_ts_empty_in      => tx_ts_empty,
+        tx_ts_rd_en         => tx_ts_rd_en,
+        -- MAC control
+        loopback_mode       => loopback_mode,
+        -- AXI lite
+        S_AXI_AWADDR        => s_axi_awaddr,
+        S_AXI_AWVALID       => s_axi_awvalid,
+        S_AXI_AWREADY       => s_axi_awready,
+        S_AXI_WDATA         => s_axi_wdata,
+        S_AXI_WSTRB         => s_axi_wstrb,
+        S_AXI_WVALID        => s_axi_wvalid,
+        S_AXI_WREADY        => s_axi_wready,
+        S_AXI_BRESP         => s_axi_bresp,
+        S_AXI_BVALID        => s_axi_bvalid,
+        S_AXI_BREADY        => s_axi_bready,
+        S_AXI_ARADDR        => s_axi_araddr,
+        S_AXI_ARVALID       => s_axi_arvalid,
+        S_AXI_ARREADY       => s_axi_arready,
+        S_AXI_RDATA         => s_axi_rdata,
+        S_AXI_RRESP         => s_axi_rresp,
+        S_AXI_RVALID        => s_axi_rvalid,
+        S_AXI_RREADY        => s_axi_rready
+    );
+
+end architecture rtl;
@@ -0,0 +1,24 @@
+# Runs the loopback tests against both MACs.
+# Run from sim/ with: pytest -n auto mac_loopback
+from pathlib import Path
+
+import pytest
+
+from sim_runner import run_tb
+
+TB_DIR = Path(__file__).resolve().parent
+
+
+@pytest.mark.parametrize("testcase", [
+    "mac_loopback_mac",
+    pytest.param("mac_loopback_phy", marks=pytest.mark.skip(
+        reason="RMII RX path is disabled in mac_rmii_phy's mac_standard_rx_test and unverified")),
+], ids=["mac", "phy"])
+def test_mac_loopback_rmii(testcase):
+    run_tb(TB_DIR, "loopback_sim", ["comp", "mac", "mdio", "nic"],
+           parameters={"PHY": "RMII"}, testcase=testcase)
+
+
+def test_mac_loopback_mii():
+    run_tb(TB_DIR, "loopback_sim", ["comp", "mac", "mdio", "nic"],
+           parameters={"PHY": "MII"})
@@ -2,12 +2,25 @@ import cocotb
 import struct
 import string
 import random
+import zlib
 from cocotb.triggers import Timer
 from cocotbext.eth import MiiSource, MiiSink
 from cocotbext.eth import GmiiFrame, MiiPhy
 from cocotb.clock import Clock
-from cocotb.triggers import RisingEdge
-from cocotbext.axi import (AxiStreamBus, AxiStreamSource, AxiStreamSink, AxiStreamMonitor)
+from cocotb.triggers import RisingEdge, ReadOnly
+from cocotb.utils import get_sim_time
+from cocotbext.axi import (AxiStreamBus, AxiStreamSource, AxiStreamSink, AxiStreamMonitor, AxiStreamFrame)
+from cocotbext.axi import AxiLiteBus, AxiLiteMaster
+from waves import capture_waves
+from sim_profile import profile_sim
+from pcap import PcapReader, PcapWriter, FrameTracker, ReplayConfig, replay, capture, steps_to_ns
+from bench import BenchConfig, record
+from mac_perf_model import PerfResult, ETH_HEADER_SIZE, FCS_SIZE, INTER_PKT_GAP_SIZE, SYS_CLK_NS
+
+# MAC_registers timestamp registers
+REG_TX_TIMESTAMP        = 0x10
+REG_TX_TIMESTAMP_STATUS = 0x14
+REG_TIMESTAMP           = 0x18
 
 class eth_frame:
     def __init__(self, src_mac : bytearray, dst_mac : bytearray):
@@ -31,6 +44,8 @@ class eth_frame:
 
 # Test RX pipeline of MAC
 @cocotb.test()
+@capture_waves
+@profile_sim
 async def mac_standard_rx_test(dut):
     clock = Clock(dut.clk, 10, units="ns")
     cocotb.start_soon(clock.start())
@@ -69,6 +84,8 @@ async def mac_standard_rx_test(dut):
 
 # Test TX pipeline of MAC
 @cocotb.test()
+@capture_waves
+@profile_sim
 async def mac_standard_tx_test(dut):
     clock = Clock(dut.clk, 10, units="ns")
     cocotb.start_soon(clock.start())
@@ -108,6 +125,8 @@ async def mac_standard_tx_test(dut):
 
 # Test that no packets are lost when TX FIFOS are flooded
 @cocotb.test()
+@capture_waves
+@profile_sim
 async def mac_flood_tx_pipe(dut):
     clock = Clock(dut.clk, 10, units="ns")
     cocotb.start_soon(clock.start())
@@ -148,3 +167,292 @@ async def mac_flood_tx_pipe(dut):
     for e in expected:
         actual = (await mii_phy.tx.recv()).data
         assert e == actual
+
+def write_random_pcap(filename, eth, count=20):
+    """ Write a pcap of gen_pkt frames with random gaps, used when PCAP_IN isn't set """
+    time_ns = 0
+    with PcapWriter(filename) as writer:
+        for _ in range(0, count):
+            random_data = ''.join(random.choice(string.ascii_letters) for i in range(random.randrange(0, 1000)))
+            pkt = eth.gen_pkt(random_data)
+            writer.write(time_ns, pkt)
+            # Wire time at 100Mbit plus a random gap
+            time_ns += (len(pkt) + 24) * 80 + random.randrange(1000, 20000)
+
+# Replay a pcap into the RX side, echo what the MAC receives back out of TX
+# and capture the TX side to a pcap
+@cocotb.test()
+@capture_waves
+@profile_sim
+async def mac_pcap_replay(dut):
+    config = ReplayConfig.from_env()
+    clock = Clock(dut.clk, 10, units="ns")
+    cocotb.start_soon(clock.start())
+
+    dut.rst.value = 0
+
+    mii_phy = MiiPhy(
+        dut.mii_tx_data, 
+        dut.mii_tx_er, 
+        dut.mii_tx_en, 
+        dut.mii_tx_clk,
+        dut.mii_rx_data, 
+        dut.mii_rx_er, 
+        dut.mii_rx_en, 
+        dut.mii_rx_clk, 
+        dut.mii_rst_phy, 
+        speed=10e6
+    )
+    # Don't queue up the capture, the reader only reads ahead what the PHY can take
+    mii_phy.rx.queue_occupancy_limit_frames = 2
+    axis_sink = AxiStreamSink(AxiStreamBus.from_prefix(dut, "rx_m_axis"), dut.clk, dut.rst)
+    axis_source = AxiStreamSource(AxiStreamBus.from_prefix(dut, "tx_s_axis"), dut.clk, dut.rst)
+
+    await Timer(10, 'us')
+    mii_phy.set_speed(100e6)
+
+    pcap_in = config.pcap_in
+    if pcap_in is None:
+        pcap_in = "mac_pcap_replay_in.pcap"
+        write_random_pcap(pcap_in, eth_frame(b'\xDE\xAD\xBE\xEF\x00\x00', b'\xCA\xFE\xBA\xBE\x00\x00'))
+    reader = PcapReader(pcap_in)
+    writer = PcapWriter(config.pcap_out or "mac_pcap_replay_tx.pcap")
+    rx = FrameTracker("RX (MII in -> AXIS out)")
+    tx = FrameTracker("TX (AXIS in -> MII out)")
+
+    def rx_sent(frame):
+        if frame.sim_time_end is not None:
+            rx.frame_in(frame.get_payload(strip_fcs=False), steps_to_ns(frame.sim_time_end))
+
+    def tx_sent(frame):
+        tx.frame_in(frame.tdata, steps_to_ns(frame.sim_time_start))
+
+    async def send(data):
+        await mii_phy.rx.send(GmiiFrame.from_payload(data, tx_complete=rx_sent))
+
+    async def echo():
+        while True:
+            frame = await axis_sink.recv()
+            # The received frame ends with its FCS, the TX pipeline adds its own
+            rx.frame_out(frame.tdata, steps_to_ns(frame.sim_time_end))
+            await axis_source.send(AxiStreamFrame(frame.tdata[:-4], tx_complete=tx_sent))
+
+    echo_task = cocotb.start_soon(echo())
+    capture_task = cocotb.start_soon(capture(mii_phy.tx.recv, writer, tx))
+
+    sent = await replay(reader, send, config.time_scale, config.max_frames)
+    await mii_phy.rx.wait()
+    # Let the last frames make it through, give up after 100us without progress
+    progress = None
+    while rx.in_flight() or tx.in_flight():
+        if progress == (rx.received, tx.received):
+            break
+        progress = (rx.received, tx.received)
+        await Timer(100, 'us')
+
+    echo_task.kill()
+    capture_task.kill()
+    writer.close()
+
+    dut._log.info("Replayed %d frames from %s (%d skipped, %d padded), wrote %d frames to %s",
+                  sent, pcap_in, reader.skipped(), reader.padded, writer.frames, writer.filename)
+    dut._log.info(rx.summary())
+    dut._log.info(tx.summary())
+    assert rx.unexpected == 0 and tx.unexpected == 0, "MAC output frames that were never sent"
+    assert tx.errors == 0, "MAC transmitted frames with a bad FCS"
+    if config.pcap_in is None:
+        assert rx.received == sent and tx.received == sent, "Frames were dropped"
+
+# Push BENCH_FRAMES frames back to back through the TX pipeline and record the
+# throughput and latency, see sim/common/bench.py
+@cocotb.test()
+@capture_waves
+@profile_sim
+async def mac_tx_benchmark(dut):
+    config = BenchConfig.from_env()
+    clock = Clock(dut.clk, 10, units="ns")
+    cocotb.start_soon(clock.start())
+
+    dut.rst.value = 0
+
+    mii_phy = MiiPhy(
+        dut.mii_tx_data, 
+        dut.mii_tx_er, 
+        dut.mii_tx_en, 
+        dut.mii_tx_clk,
+        dut.mii_rx_data, 
+        dut.mii_rx_er, 
+        dut.mii_rx_en, 
+        dut.mii_rx_clk, 
+        dut.mii_rst_phy, 
+        speed=10e6
+    )
+    axis_source = AxiStreamSource(AxiStreamBus.from_prefix(dut, "tx_s_axis"), dut.clk, dut.rst)
+
+    await Timer(10, 'us')
+    mii_phy.set_speed(100e6)
+    eth = eth_frame(b'\xDE\xAD\xBE\xEF\x00\x00', b'\xCA\xFE\xBA\xBE\x00\x00')
+    tx = FrameTracker("TX (AXIS in -> MII out)")
+    result = PerfResult(tx.name)
+
+    def tx_sent(frame):
+        tx.frame_in(frame.tdata, steps_to_ns(frame.sim_time_start))
+
+    for length in config.lengths():
+        random_data = ''.join(random.choice(string.ascii_letters) for i in range(length - ETH_HEADER_SIZE))
+        await axis_source.send(AxiStreamFrame(eth.gen_pkt(random_data), tx_complete=tx_sent))
+
+    for _ in range(0, config.frames):
+        frame = await mii_phy.tx.recv()
+        payload = frame.get_payload()
+        time_out = steps_to_ns(frame.sim_time_end)
+        latency = tx.frame_out(payload, time_out, ok=frame.check_fcs())
+        if latency is not None:
+            result.add(time_out - latency, time_out, len(payload) + FCS_SIZE)
+    result.dropped = tx.dropped
+
+    record("mac_tx_benchmark", result)
+    assert tx.received == config.frames and tx.errors == 0
+
+# Send BENCH_FRAMES frames back to back into the RX pipeline and record the
+# throughput, latency and drops, see sim/common/bench.py
+@cocotb.test()
+@capture_waves
+@profile_sim
+async def mac_rx_benchmark(dut):
+    config = BenchConfig.from_env()
+    clock = Clock(dut.clk, 10, units="ns")
+    cocotb.start_soon(clock.start())
+
+    dut.rst.value = 0
+
+    mii_phy = MiiPhy(
+        dut.mii_tx_data, 
+        dut.mii_tx_er, 
+        dut.mii_tx_en, 
+        dut.mii_tx_clk,
+        dut.mii_rx_data, 
+        dut.mii_rx_er, 
+        dut.mii_rx_en, 
+        dut.mii_rx_clk, 
+        dut.mii_rst_phy, 
+        speed=10e6
+    )
+    mii_phy.set_speed(100e6)
+    # Gap between frames of 12 bytes, the source counts it in nibbles
+    mii_phy.rx.ifg = INTER_PKT_GAP_SIZE * 2
+    axis_sink = AxiStreamSink(AxiStreamBus.from_prefix(dut, "rx_m_axis"), dut.clk, dut.rst)
+    eth = eth_frame(b'\xDE\xAD\xBE\xEF\x00\x00', b'\xCA\xFE\xBA\xBE\x00\x00')
+    rx = FrameTracker("RX (MII in -> AXIS out)")
+    result = PerfResult(rx.name)
+
+    def rx_sent(frame):
+        rx.frame_in(frame.get_payload(strip_fcs=False), steps_to_ns(frame.sim_time_end))
+
+    async def receive():
+        while True:
+            frame = await axis_sink.recv()
+            time_out = steps_to_ns(frame.sim_time_end)
+            # The received frame ends with its FCS
+            fcs_ok = struct.pack("<I", zlib.crc32(bytes(frame.tdata[:-FCS_SIZE]))) == bytes(frame.tdata[-FCS_SIZE:])
+            latency = rx.frame_out(frame.tdata, time_out, ok=fcs_ok)
+            if latency is not None:
+                result.add(time_out - latency, time_out, len(frame.tdata))
+
+    receive_task = cocotb.start_soon(receive())
+    for length in config.lengths():
+        random_data = ''.join(random.choice(string.ascii_letters) for i in range(length - ETH_HEADER_SIZE))
+        await mii_phy.rx.send(GmiiFrame.from_payload(eth.gen_pkt(random_data), tx_complete=rx_sent))
+    await mii_phy.rx.wait()
+    # A frame takes at most a few us to come out after it was sent
+    await Timer(50, 'us')
+    receive_task.kill()
+    result.dropped = rx.dropped + rx.in_flight()
+
+    record("mac_rx_benchmark", result)
+    dut._log.info(rx.summary())
+    # Frames may be dropped (see mac_perf_model.RxModel), but every frame sent
+    # is either received intact or counted as dropped
+    assert rx.sent == config.frames
+    assert rx.unexpected == 0 and rx.errors == 0
+    assert result.frames == rx.received and result.frames + result.dropped == config.frames
+
+# Check the RX (tuser) and TX (register FIFO) frame timestamps against the
+# sim time the frames' SFD / first preamble nibble were on the wire
+@cocotb.test()
+@capture_waves
+@profile_sim
+async def mac_timestamp_test(dut):
+    clock = Clock(dut.clk, SYS_CLK_NS, units="ns")
+    cocotb.start_soon(clock.start())
+
+    dut.rst.value = 0
+
+    mii_phy = MiiPhy(
+        dut.mii_tx_data, 
+        dut.mii_tx_er, 
+        dut.mii_tx_en, 
+        dut.mii_tx_clk,
+        dut.mii_rx_data, 
+        dut.mii_rx_er, 
+        dut.mii_rx_en, 
+        dut.mii_rx_clk, 
+        dut.mii_rst_phy, 
+        speed=10e6
+    )
+    axis_sink = AxiStreamSink(AxiStreamBus.from_prefix(dut, "rx_m_axis"), dut.clk, dut.rst)
+    axis_source = AxiStreamSource(AxiStreamBus.from_prefix(dut, "tx_s_axis"), dut.clk, dut.rst)
+    axil = AxiLiteMaster(AxiLiteBus.from_prefix(dut, "s_axi"), dut.clk, dut.rst)
+
+    await Timer(10, 'us')
+    mii_phy.set_speed(100e6)
+    eth = eth_frame(b'\xDE\xAD\xBE\xEF\x00\x00', b'\xCA\xFE\xBA\xBE\x00\x00')
+
+    # Map timestamps to sim time
+    await RisingEdge(dut.clk)
+    await ReadOnly()
+    ref_ts = dut.timestamp.value.integer
+    ref_ns = get_sim_time("ns")
+    ts_to_ns = lambda ts: ref_ns + ((ts - ref_ts) % 2**32) * SYS_CLK_NS
+    await RisingEdge(dut.clk)
+
+    reg_ts = await axil.read_dword(REG_TIMESTAMP)
+    assert 0 < ts_to_ns(reg_ts) - ref_ns < 1000, "Timestamp register doesn't follow the counter"
+
+    trials = 5
+    # An RX frame is timestamped once its SFD made it through the RX FIFO,
+    # a TX frame once its start is synced back to the sys clk domain. Both
+    # delays are fixed up to the phase of the phy clock, one MII byte time.
+    max_delay_ns = 1000
+    max_jitter_ns = 2 * 40
+
+    # RX, SFD on the wire -> tuser
+    sfd_times = []
+
+    def rx_sent(frame):
+        sfd_times.append(steps_to_ns(frame.sim_time_sfd))
+
+    rx_delays = []
+    for _ in range(0, trials):
+        random_data = ''.join(random.choice(string.ascii_letters) for i in range(random.randrange(0, 1000)))
+        await mii_phy.rx.send(GmiiFrame.from_payload(eth.gen_pkt(random_data), tx_complete=rx_sent))
+        frame = await axis_sink.recv()
+        tuser = frame.tuser if isinstance(frame.tuser, int) else frame.tuser[0]
+        rx_delays.append(ts_to_ns(tuser) - sfd_times[-1])
+
+    # TX, first preamble nibble on the wire -> TX timestamp FIFO
+    tx_delays = []
+    for _ in range(0, trials):
+        random_data = ''.join(random.choice(string.ascii_letters) for i in range(random.randrange(0, 1000)))
+        await axis_source.send(eth.gen_pkt(random_data))
+        frame = await mii_phy.tx.recv()
+        assert await axil.read_dword(REG_TX_TIMESTAMP_STATUS) & 1, "No TX timestamp"
+        tx_ts = await axil.read_dword(REG_TX_TIMESTAMP)
+        tx_delays.append(ts_to_ns(tx_ts) - steps_to_ns(frame.sim_time_start))
+    assert await axil.read_dword(REG_TX_TIMESTAMP_STATUS) & 1 == 0, "More TX timestamps than frames"
+
+    dut._log.info("RX timestamp delays (ns): %s", rx_delays)
+    dut._log.info("TX timestamp delays (ns): %s", tx_delays)
+    for name, delays in (("RX", rx_delays), ("TX", tx_delays)):
+        assert all(abs(d) < max_delay_ns for d in delays), "%s timestamps are off" % (name)
+        assert max(delays) - min(delays) <= max_jitter_ns, "%s timestamps jitter" % (name)
@@ -3,8 +3,12 @@ use ieee.std_logic_1164.all;
 use ieee.numeric_std.all;
 
 library mac;
+library mdio;
 
 entity tb is
+    generic (
+        TX_UNFOLD_CNT : natural := 2
+    );
 end entity tb;
 
 architecture rtl of tb is
@@ -18,6 +22,7 @@ architecture rtl of tb is
     signal rx_m_axis_tvalid        : std_logic;
     signal rx_m_axis_tready        : std_logic;
     signal rx_m_axis_tlast         : std_logic;
+    signal rx_m_axis_tuser         : std_logic_vector(31 downto 0);
     ---------------------------------------
     -- AXI TX Data Stream 
     ---------------------------------------
@@ -38,10 +43,41 @@ architecture rtl of tb is
     signal mii_rx_er               : std_logic;
     signal mii_rx_data             : std_logic_vector(3 downto 0);
     signal mii_rst_phy             : std_logic := '0';
+    ---------------------------------------
+    -- Timestamps
+    ---------------------------------------
+    signal timestamp               : std_logic_vector(mac.MAC_pack.TIMESTAMP_WIDTH - 1 downto 0);
+    signal tx_ts_data              : std_logic_vector(mac.MAC_pack.TIMESTAMP_WIDTH - 1 downto 0);
+    signal tx_ts_empty             : std_logic;
+    signal tx_ts_rd_en             : std_logic;
+    signal loopback_mode           : std_logic_vector(1 downto 0);
+    ---------------------------------------
+    -- AXI lite registers
+    ---------------------------------------
+    signal s_axi_aresetn           : std_logic;
+    signal s_axi_awaddr            : std_logic_vector(31 downto 0);
+    signal s_axi_awvalid           : std_logic;
+    signal s_axi_awready           : std_logic;
+    signal s_axi_wdata             : std_logic_vector(31 downto 0);
+    signal s_axi_wstrb             : std_logic_vector(3 downto 0);
+    signal s_axi_wvalid            : std_logic;
+    signal s_axi_wready            : std_logic;
+    signal s_axi_bresp             : std_logic_vector(1 downto 0);
+    signal s_axi_bvalid            : std_logic;
+    signal s_axi_bready            : std_logic;
+    signal s_axi_araddr            : std_logic_vector(31 downto 0);
+    signal s_axi_arvalid           : std_logic;
+    signal s_axi_arready           : std_logic;
+    signal s_axi_rdata             : std_logic_vector(31 downto 0);
+    signal s_axi_rresp             : std_logic_vector(1 downto 0);
+    signal s_axi_rvalid            : std_logic;
+    signal s_axi_rready            : std_logic;
 begin
 
     mac_mii_inst : entity mac.MAC_MII
-    port map (
+    generic map (
+        TX_UNFOLD_CNT           => TX_UNFOLD_CNT
+    ) port map (
         clk                     => clk,
         rst                     => rst,
         ---------------------------------------
@@ -52,6 +88,7 @@ begin
         rx_m_axis_tvalid        => rx_m_axis_tvalid,
         rx_m_axis_tready        => rx_m_axis_tready,
         rx_m_axis_tlast         => rx_m_axis_tlast,
+        rx_m_axis_tuser         => rx_m_axis_tuser,
         ---------------------------------------
         -- AXI TX Data Stream 
         ---------------------------------------
@@ -61,6 +98,14 @@ begin
         tx_s_axis_tready        => tx_s_axis_tready,
         tx_s_axis_tlast         => tx_s_axis_tlast,
         ---------------------------------------
+        -- Timestamps
+        ---------------------------------------
+        timestamp_out           => timestamp,
+        tx_ts_data              => tx_ts_data,
+        tx_ts_empty             => tx_ts_empty,
+        tx_ts_rd_en             => tx_ts_rd_en,
+        loopback_mode           => loopback_mode,
+        ---------------------------------------
         -- MII PHY interface
         ---------------------------------------
         mii_tx_clk              => mii_tx_clk,
@@ -74,4 +119,48 @@ begin
         mii_rst_phy             => mii_rst_phy
     );
 
+    s_axi_aresetn <= not rst;
+
+    mac_registers_inst : entity mdio.MAC_registers(rtl)
+    generic map (
+        TIMESTAMP_WIDTH     => mac.MAC_pack.TIMESTAMP_WIDTH
+    ) port map (
+        clk                 => clk,
+        rstn                => s_axi_aresetn,
+        -- MDIO
+        mdio_phy_addr       => open,
+        mdio_reg_addr       => open,
+        mdio_data_out       => open,
+        mdio_write          => open,
+        mdio_start          => open,
+        mdio_data_in        => (others => '0'),
+        mdio_din_valid      => '0',
+        mdio_busy_in        => '0',
+        -- Timestamps
+        timestamp_in        => timestamp,
+        tx_ts_data_in       => tx_ts_data,
+        tx_ts_empty_in      => tx_ts_empty,
+        tx_ts_rd_en         => tx_ts_rd_en,
+        -- MAC control
+        loopback_mode       => loopback_mode,
+        -- AXI lite
+        S_AXI_AWADDR        => s_axi_awaddr,
+        S_AXI_AWVALID       => s_axi_awvalid,
+        S_AXI_AWREADY       => s_axi_awready,
+        S_AXI_WDATA         => s_axi_wdata,
+        S_AXI_WSTRB         => s_axi_wstrb,
+        S_AXI_WVALID        => s_axi_wvalid,
+        S_AXI_WREADY        => s_axi_wready,
+        S_AXI_BRESP         => s_axi_bresp,
+        S_AXI_BVALID        => s_axi_bvalid,
+        S_AXI_BREADY        => s_axi_bready,
+        S_AXI_ARADDR        => s_axi_araddr,
+        S_AXI_ARVALID       => s_axi_arvalid,
+        S_AXI_ARREADY       => s_axi_arready,
+        S_AXI_RDATA         => s_axi_rdata,
+        S_AXI_RRESP         => s_axi_rresp,
+        S_AXI_RVALID        => s_axi_rvalid,
+        S_AXI_RREADY        => s_axi_rready
+    );
+
 end architecture rtl;
\ No newline at end of file
@@ -0,0 +1,45 @@
+# Calibration of the MAC performance model (sim/common/mac_perf_model.py)
+# against the benchmark tests of this testbench. The same frames are run
+# through the simulated MAC and through the model, their throughput and
+# latency have to agree. The default configuration (random frame lengths,
+# TX_UNFOLD_CNT=2) runs with the other tests, the rest of the sweep is opt-in.
+# Run from sim/ with: pytest -n auto --perf-calibration mac_mii_phy/test_mac_mii_perf.py
+from pathlib import Path
+
+import pytest
+
+from bench import BenchConfig, compare, read_results
+from mac_perf_model import RxModel, TxModel, saturated
+from sim_runner import run_tb
+
+TB_DIR = Path(__file__).resolve().parent
+
+# 0 for the random eth_frame.gen_pkt lengths
+FRAME_LENS = [0, 64, 256, 1514]
+
+
+def swept(values, default):
+    """ Parameter values with all but the tb's default marked as calibration """
+    return [v if v == default else pytest.param(v, marks=pytest.mark.calibration) for v in values]
+
+
+@pytest.mark.parametrize("frame_len", swept(FRAME_LENS, 0))
+@pytest.mark.parametrize("tx_unfold_cnt", swept([1, 2, 3], 2))
+def test_mac_mii_tx_perf(tx_unfold_cnt, frame_len):
+    config = BenchConfig(length=frame_len)
+    results = run_tb(TB_DIR, "mac_sim", ["comp", "mac", "mdio"],
+                     parameters={"TX_UNFOLD_CNT": tx_unfold_cnt},
+                     extra_env=config.env(), testcase="mac_tx_benchmark")
+    measured = read_results(results)["mac_tx_benchmark"]
+    model = TxModel(pipes=tx_unfold_cnt, phy="mii").run(saturated(config.lengths()))
+    assert compare(measured, model) == []
+
+
+@pytest.mark.parametrize("frame_len", swept(FRAME_LENS, 0))
+def test_mac_mii_rx_perf(frame_len):
+    config = BenchConfig(length=frame_len)
+    results = run_tb(TB_DIR, "mac_sim", ["comp", "mac", "mdio"],
+                     extra_env=config.env(), testcase="mac_rx_benchmark")
+    measured = read_results(results)["mac_rx_benchmark"]
+    model = RxModel(phy="mii").run(saturated(config.lengths()))
+    assert compare(measured, model) == []
@@ -0,0 +1,16 @@
+# Sweeps the number of TX frame builder pipes (MAC_tx_pipeline PIPELINE_ELEM_CNT,
+# set through the TX_UNFOLD_CNT generic), one sim per value.
+# Run from sim/ with: pytest -n auto mac_rmii_phy
+from pathlib import Path
+
+import pytest
+
+from sim_runner import run_tb
+
+TB_DIR = Path(__file__).resolve().parent
+
+
+@pytest.mark.parametrize("tx_unfold_cnt", [1, 2, 3, 4])
+def test_mac_rmii(tx_unfold_cnt):
+    run_tb(TB_DIR, "mac_sim", ["comp", "mac", "mdio"],
+           parameters={"TX_UNFOLD_CNT": tx_unfold_cnt})
@@ -0,0 +1,213 @@
+import os
+import random
+import struct
+
+import cocotb
+from cocotb.clock import Clock
+from cocotb.triggers import RisingEdge, Timer, with_timeout
+from cocotb.utils import get_sim_time
+from cocotbext.eth import MiiPhy
+from cocotbext.axi import (AxiStreamBus, AxiStreamSource, AxiStreamFrame)
+from waves import capture_waves
+from sim_profile import profile_sim
+from pcap import FrameTracker, steps_to_ns
+from bench import BenchConfig, record
+from mac_perf_model import PerfResult, ETH_HEADER_SIZE, FCS_SIZE, SYS_CLK_NS
+
+# Generics of the tb
+ARBITER = os.getenv("TB_ARBITER", "STRICT")
+TX_UNFOLD_CNT = int(os.getenv("TB_TX_UNFOLD_CNT", "2"))
+WRR_LO_WEIGHT = int(os.getenv("TB_WRR_LO_WEIGHT", "1"))
+WRR_HI_WEIGHT = int(os.getenv("TB_WRR_HI_WEIGHT", "3"))
+
+DST_MAC = b'\xCA\xFE\xBA\xBE\x00\x00'
+LO_SRC_MAC = b'\xDE\xAD\xBE\xEF\x00\x00'
+HI_SRC_MAC = b'\xDE\xAD\xBE\xEF\x00\x01'
+
+# Bulk frames of the low priority queue and control frames of the high one
+LO_LEN = 1514
+HI_LEN = 60
+# Low priority frames kept waiting in the source during the flood
+LO_BACKLOG = 4
+# Longest wait for a frame, a full size one behind the TX pipes at 100Mbps
+FRAME_TIMEOUT_US = 1000
+
+TAG_TPID = 0x8100
+
+
+def gen_frame(src_mac, length):
+    """ Frame of length bytes without FCS, random payload """
+    payload = bytes(random.randrange(256) for _ in range(length - ETH_HEADER_SIZE))
+    return DST_MAC + src_mac + struct.pack(">H", len(payload)) + payload
+
+
+def tagged(data, pcp, vid):
+    """ data with the 802.1Q tag MAC_tx_arbiter inserts after the source MAC """
+    return data[:12] + struct.pack(">HH", TAG_TPID, (pcp << 13) | vid) + data[12:]
+
+
+async def setup(dut):
+    cocotb.start_soon(Clock(dut.clk, SYS_CLK_NS, units="ns").start())
+
+    mii_phy = MiiPhy(
+        dut.mii_tx_data,
+        dut.mii_tx_er,
+        dut.mii_tx_en,
+        dut.mii_tx_clk,
+        dut.mii_rx_data,
+        dut.mii_rx_er,
+        dut.mii_rx_en,
+        dut.mii_rx_clk,
+        dut.mii_rst_phy,
+        speed=100e6
+    )
+    lo_source = AxiStreamSource(AxiStreamBus.from_prefix(dut, "lo_axis"), dut.clk, dut.rst)
+    hi_source = AxiStreamSource(AxiStreamBus.from_prefix(dut, "hi_axis"), dut.clk, dut.rst)
+
+    dut.vlan_en.value = 0
+    dut.vlan_vid.value = 0
+    dut.lo_pcp.value = 0
+    dut.hi_pcp.value = 0
+    dut.rst.value = 1
+    for _ in range(5):
+        await RisingEdge(dut.clk)
+    dut.rst.value = 0
+    await RisingEdge(dut.clk)
+    return mii_phy, lo_source, hi_source
+
+# Flood the low priority queue with full size frames while BENCH_FRAMES small
+# frames are sent on the high priority queue at random times. Records the
+# latency of both queues, the high priority one from the moment its frame is
+# queued so the wait for the arbiter is part of it, see sim/common/bench.py
+@cocotb.test()
+@capture_waves
+@profile_sim
+async def tx_queue_priority(dut):
+    config = BenchConfig.from_env()
+    mii_phy, lo_source, hi_source = await setup(dut)
+
+    lo = FrameTracker("TX low priority (AXIS in -> MII out)")
+    hi = FrameTracker("TX high priority (queued -> MII out)")
+    lo_result = PerfResult(lo.name)
+    hi_result = PerfResult(hi.name)
+    lo_ends_ns = []
+    hi_spans_ns = []
+    flooding = True
+
+    def lo_sent(frame):
+        lo.frame_in(frame.tdata, steps_to_ns(frame.sim_time_start))
+
+    async def flood():
+        while flooding:
+            if lo_source.count() < LO_BACKLOG:
+                await lo_source.send(AxiStreamFrame(gen_frame(LO_SRC_MAC, LO_LEN), tx_complete=lo_sent))
+            else:
+                await RisingEdge(dut.clk)
+
+    async def receive():
+        while True:
+            frame = await mii_phy.tx.recv()
+            payload = frame.get_payload()
+            time_out = steps_to_ns(frame.sim_time_end)
+            tracker, result = (hi, hi_result) if payload[6:12] == HI_SRC_MAC else (lo, lo_result)
+            latency = tracker.frame_out(payload, time_out, ok=frame.check_fcs())
+            if latency is None:
+                continue
+            result.add(time_out - latency, time_out, len(payload) + FCS_SIZE)
+            if tracker is lo:
+                lo_ends_ns.append(time_out)
+            else:
+                hi_spans_ns.append((time_out - latency, time_out))
+
+    flood_task = cocotb.start_soon(flood())
+    receive_task = cocotb.start_soon(receive())
+
+    # Let the flood fill the TX pipes
+    await Timer(200, 'us')
+    for _ in range(config.frames):
+        data = gen_frame(HI_SRC_MAC, HI_LEN)
+        hi.frame_in(data, get_sim_time("ns"))
+        await hi_source.send(data)
+        await Timer(random.randrange(50, 150), 'us')
+
+    # Drain the queues, give up after 500us without progress
+    flooding = False
+    await flood_task
+    progress = None
+    while (lo.in_flight() or hi.in_flight()) and progress != (lo.received, hi.received):
+        progress = (lo.received, hi.received)
+        await Timer(500, 'us')
+    receive_task.kill()
+    lo_result.dropped = lo.dropped + lo.in_flight()
+    hi_result.dropped = hi.dropped + hi.in_flight()
+
+    record("tx_queue_lo", lo_result)
+    record("tx_queue_hi", hi_result)
+    dut._log.info(lo.summary())
+    dut._log.info(hi.summary())
+    assert lo.received == lo.sent and lo.errors == 0
+    assert hi.received == config.frames and hi.errors == 0
+
+    # Low priority frames that left the MAC while a high priority one waited
+    passed = [sum(1 for end in lo_ends_ns if start < end < done) for start, done in hi_spans_ns]
+    dut._log.info("Low priority frames passed per high priority frame: max %d, mean %.2f",
+                  max(passed), sum(passed) / len(passed))
+    if ARBITER == "STRICT":
+        # The frame in the arbiter and the ones in the pipes, never the backlog
+        assert max(passed) <= TX_UNFOLD_CNT + 1
+
+# 802.1Q tag insertion with the PCP of each queue
+@cocotb.test()
+@capture_waves
+@profile_sim
+async def tx_queue_vlan_tag(dut):
+    mii_phy, lo_source, hi_source = await setup(dut)
+
+    vid = random.randrange(1, 4095)
+    lo_pcp, hi_pcp = 1, 6
+    dut.vlan_en.value = 1
+    dut.vlan_vid.value = vid
+    dut.lo_pcp.value = lo_pcp
+    dut.hi_pcp.value = hi_pcp
+
+    trials = 3
+    for _ in range(0, trials):
+        for source, src_mac, pcp in ((lo_source, LO_SRC_MAC, lo_pcp), (hi_source, HI_SRC_MAC, hi_pcp)):
+            data = gen_frame(src_mac, random.randrange(60, 1000))
+            await source.send(data)
+            frame = await with_timeout(mii_phy.tx.recv(), FRAME_TIMEOUT_US, 'us')
+            assert frame.get_payload() == tagged(data, pcp, vid)
+            assert frame.check_fcs()
+
+    # Untagged again once vlan_en is cleared
+    dut.vlan_en.value = 0
+    data = gen_frame(HI_SRC_MAC, HI_LEN)
+    await hi_source.send(data)
+    frame = await with_timeout(mii_phy.tx.recv(), FRAME_TIMEOUT_US, 'us')
+    assert frame.get_payload() == data
+    assert frame.check_fcs()
+
+# Both queues flooded, each gets its WRR weight share of the frames
+@cocotb.test(skip=(ARBITER != "WRR"))
+@capture_waves
+@profile_sim
+async def tx_queue_wrr_share(dut):
+    mii_phy, lo_source, hi_source = await setup(dut)
+
+    rounds = 10
+    total = rounds * (WRR_LO_WEIGHT + WRR_HI_WEIGHT)
+    # Both queues stay backlogged for the first total frames
+    for _ in range(total):
+        await lo_source.send(gen_frame(LO_SRC_MAC, 200))
+        await hi_source.send(gen_frame(HI_SRC_MAC, 200))
+
+    hi_frames = 0
+    for _ in range(total):
+        frame = await with_timeout(mii_phy.tx.recv(), FRAME_TIMEOUT_US, 'us')
+        assert frame.check_fcs()
+        if frame.get_payload()[6:12] == HI_SRC_MAC:
+            hi_frames += 1
+
+    dut._log.info("High priority share: %d of %d frames", hi_frames, total)
+    # Off by a frame when a queue gets its first frame in a cycle after the other one
+    assert abs(hi_frames - rounds * WRR_HI_WEIGHT) <= 1
@@ -0,0 +1,135 @@
+library ieee;
+use ieee.std_logic_1164.all;
+use ieee.numeric_std.all;
+
+library mac;
+
+-- A low (queue 0) and a high (queue 1) priority TX stream merged by
+-- MAC_tx_arbiter in front of a MAC_MII
+entity tb is
+    generic (
+        ARBITER         : string := "STRICT";
+        TX_UNFOLD_CNT   : natural := 2;
+        WRR_LO_WEIGHT   : natural := 1;
+        WRR_HI_WEIGHT   : natural := 3
+    );
+end entity tb;
+
+architecture rtl of tb is
+    signal clk                     : std_logic;
+    signal rst                     : std_logic;
+    ---------------------------------------
+    -- TX queues
+    ---------------------------------------
+    signal lo_axis_tdata           : std_logic_vector(7 downto 0);
+    signal lo_axis_tvalid          : std_logic;
+    signal lo_axis_tready          : std_logic;
+    signal lo_axis_tlast           : std_logic;
+    signal hi_axis_tdata           : std_logic_vector(7 downto 0);
+    signal hi_axis_tvalid          : std_logic;
+    signal hi_axis_tready          : std_logic;
+    signal hi_axis_tlast           : std_logic;
+    -- 802.1Q tag
+    signal vlan_en                 : std_logic;
+    signal vlan_vid                : std_logic_vector(11 downto 0);
+    signal lo_pcp                  : std_logic_vector(2 downto 0);
+    signal hi_pcp                  : std_logic_vector(2 downto 0);
+    ---------------------------------------
+    -- AXI RX Data Stream
+    ---------------------------------------
+    signal rx_m_axis_tdata         : std_logic_vector(7 downto 0);
+    signal rx_m_axis_tstrb         : std_logic_vector(0 downto 0);
+    signal rx_m_axis_tvalid        : std_logic;
+    signal rx_m_axis_tready        : std_logic;
+    signal rx_m_axis_tlast         : std_logic;
+    signal rx_m_axis_tuser         : std_logic_vector(31 downto 0);
+    ---------------------------------------
+    -- AXI TX Data Stream
+    ---------------------------------------
+    signal tx_s_axis_tdata         : std_logic_vector(7 downto 0);
+    signal tx_s_axis_tstrb         : std_logic_vector(0 downto 0);
+    signal tx_s_axis_tvalid        : std_logic;
+    signal tx_s_axis_tready        : std_logic;
+    signal tx_s_axis_tlast         : std_logic;
+    ---------------------------------------
+    -- MII Interface
+    ---------------------------------------
+    signal mii_tx_clk              : std_logic;
+    signal mii_tx_en               : std_logic;
+    signal mii_tx_er               : std_logic;
+    signal mii_tx_data             : std_logic_vector(3 downto 0);
+    signal mii_rx_clk              : std_logic;
+    signal mii_rx_en               : std_logic;
+    signal mii_rx_er               : std_logic;
+    signal mii_rx_data             : std_logic_vector(3 downto 0);
+    signal mii_rst_phy             : std_logic;
+begin
+
+    rx_m_axis_tready <= '1';
+
+    tx_arbiter_inst : entity mac.MAC_tx_arbiter(rtl)
+    generic map (
+        QUEUE_CNT           => 2,
+        ARBITER             => ARBITER,
+        WRR_WEIGHTS         => (WRR_LO_WEIGHT, WRR_HI_WEIGHT)
+    ) port map (
+        clk                 => clk,
+        rst                 => rst,
+        -- 802.1Q tag
+        vlan_en             => vlan_en,
+        vlan_vid            => vlan_vid,
+        queue_pcp(2 downto 0)   => lo_pcp,
+        queue_pcp(5 downto 3)   => hi_pcp,
+        -- Queues
+        s_axis_tdata(7 downto 0)    => lo_axis_tdata,
+        s_axis_tdata(15 downto 8)   => hi_axis_tdata,
+        s_axis_tvalid(0)    => lo_axis_tvalid,
+        s_axis_tvalid(1)    => hi_axis_tvalid,
+        s_axis_tready(0)    => lo_axis_tready,
+        s_axis_tready(1)    => hi_axis_tready,
+        s_axis_tlast(0)     => lo_axis_tlast,
+        s_axis_tlast(1)     => hi_axis_tlast,
+        -- MAC TX stream
+        m_axis_tdata        => tx_s_axis_tdata,
+        m_axis_tstrb        => tx_s_axis_tstrb,
+        m_axis_tvalid       => tx_s_axis_tvalid,
+        m_axis_tready       => tx_s_axis_tready,
+        m_axis_tlast        => tx_s_axis_tlast
+    );
+
+    mac_inst : entity mac.MAC_MII(rtl)
+    generic map (
+        TX_UNFOLD_CNT           => TX_UNFOLD_CNT
+    ) port map (
+        clk                     => clk,
+        rst                     => rst,
+        -- AXI RX Data Stream
+        rx_m_axis_tdata         => rx_m_axis_tdata,
+        rx_m_axis_tstrb         => rx_m_axis_tstrb,
+        rx_m_axis_tvalid        => rx_m_axis_tvalid,
+        rx_m_axis_tready        => rx_m_axis_tready,
+        rx_m_axis_tlast         => rx_m_axis_tlast,
+        rx_m_axis_tuser         => rx_m_axis_tuser,
+        -- AXI TX Data Stream
+        tx_s_axis_tdata         => tx_s_axis_tdata,
+        tx_s_axis_tstrb         => tx_s_axis_tstrb,
+        tx_s_axis_tvalid        => tx_s_axis_tvalid,
+        tx_s_axis_tready        => tx_s_axis_tready,
+        tx_s_axis_tlast         => tx_s_axis_tlast,
+        -- Timestamps
+        timestamp_out           => open,
+        tx_ts_data              => open,
+        tx_ts_empty             => open,
+        -- MII PHY interface
+        mii_tx_clk              => mii_tx_clk,
+        mii_tx_en               => mii_tx_en,
+        mii_tx_er               => mii_tx_er,
+        mii_tx_data             => mii_tx_data,
+        mii_rx_clk              => mii_rx_clk,
+        mii_rx_en               => mii_rx_en,
+        mii_rx_er               => mii_rx_er,
+        mii_rx_data             => mii_rx_data,
+        mii_rst_phy             => mii_rst_phy
+    );
+
+end architecture rtl;
@@ -0,0 +1,16 @@
+# Runs the TX queue tests with both arbiters.
+# Run from sim/ with: pytest -n auto mac_tx_queues
+from pathlib import Path
+
+import pytest
+
+from sim_runner import run_tb
+
+TB_DIR = Path(__file__).resolve().parent
+
+
+@pytest.mark.parametrize("tx_unfold_cnt", [1, 2])
+@pytest.mark.parametrize("arbiter", ["STRICT", "WRR"])
+def test_mac_tx_queues(arbiter, tx_unfold_cnt):
+    run_tb(TB_DIR, "queue_sim", ["comp", "mac"],
+           parameters={"ARBITER": arbiter, "TX_UNFOLD_CNT": tx_unfold_cnt})
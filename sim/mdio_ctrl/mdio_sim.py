@@ -5,9 +5,13 @@ import random
 from cocotb.clock import Clock
 from cocotb.triggers import Timer, RisingEdge
 from cocotb.utils import get_sim_time
+from waves import capture_waves
+from sim_profile import profile_sim
 
 # Test MDIO read
 @cocotb.test()
+@capture_waves
+@profile_sim
 async def mdio_rd_test(dut):
     dut.start.value = 0
     dut.wr.value = 0
@@ -39,6 +43,8 @@ async def mdio_rd_test(dut):
 
 # Test MDIO write
 @cocotb.test()
+@capture_waves
+@profile_sim
 async def mdio_wr_test(dut):
     dut.start.value = 0
     dut.wr.value = 1
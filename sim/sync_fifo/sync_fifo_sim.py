@@ -2,10 +2,14 @@ import cocotb
 from cocotb.triggers import Timer
 from cocotb.clock import Clock
 import logging
+import os
+from waves import capture_waves
+from sim_profile import profile_sim
 
 CLOCK_PERIOD = 10
 DEBUG_LEVEL = logging.INFO
-MEM_SIZE = 16
+# Defaults match tb.vhd. test_sync_fifo.py sweeps the generic.
+MEM_SIZE = int(os.getenv("TB_DEPTH", 16))
 
 async def read_fifo(dut, start, end, units="ns"):
     """ Read all entries from the FIFO """
@@ -84,11 +88,16 @@ async def reset_dut(dut, start, end, units="ns"):
     dut._log.debug("Reset Done")
 
 @cocotb.test()
+@capture_waves
+@profile_sim
 async def empty_full_empty(dut):
     """ This test fills up the FIFO and the empties it completely. """
     clock = Clock(dut.clk, CLOCK_PERIOD, units="ns")
     cocotb.start_soon(clock.start())
-    cocotb.start_soon(fill_fifo(dut, 50, 50+(MEM_SIZE * CLOCK_PERIOD)))
-    cocotb.start_soon(read_fifo(dut, 400, 400+(MEM_SIZE * CLOCK_PERIOD)))
+    fill_end = 50 + (MEM_SIZE * CLOCK_PERIOD)
+    read_start = max(400, fill_end + 100)
+    read_end = read_start + (MEM_SIZE * CLOCK_PERIOD)
+    cocotb.start_soon(fill_fifo(dut, 50, fill_end))
+    cocotb.start_soon(read_fifo(dut, read_start, read_end))
     await reset_dut(dut, 20, 45)
-    await Timer(1000, 'ns')
+    await Timer(max(1000, read_end + 100), 'ns')
@@ -0,0 +1,16 @@
+# Sweeps the sync FIFO generics, one sim per combination.
+# Run from sim/ with: pytest -n auto sync_fifo
+from pathlib import Path
+
+import pytest
+
+from sim_runner import run_tb
+
+TB_DIR = Path(__file__).resolve().parent
+
+
+@pytest.mark.parametrize("data_width", [8, 16])
+@pytest.mark.parametrize("depth", [4, 16, 64])
+def test_sync_fifo(depth, data_width):
+    run_tb(TB_DIR, "sync_fifo_sim", ["comp"],
+           parameters={"DATA_WIDTH": data_width, "DEPTH": depth})
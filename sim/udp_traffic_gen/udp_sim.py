@@ -7,8 +7,12 @@ from cocotbext.eth import GmiiFrame, MiiPhy
 from cocotb.clock import Clock
 from cocotb.triggers import RisingEdge
 from cocotbext.axi import (AxiStreamBus, AxiStreamSource, AxiStreamSink, AxiStreamMonitor, AxiLiteMaster, AxiLiteBus)
+from waves import capture_waves
+from sim_profile import profile_sim
 
 @cocotb.test()
+@capture_waves
+@profile_sim
 async def udp_traffic_gen(dut):
     clock = Clock(dut.clk, 10, units="ns")
     cocotb.start_soon(clock.start())
@@ -3,14 +3,20 @@
 This python script is for parsing cocotb's result.xml files for failures.
 
 If a failure is found, then return exit code 1
+
+With --profile it also prints the profiling results recorded by
+sim/common/sim_profile.py (the "profile:<test>:<metric>" properties).
 """
 import argparse
+import collections
 import logging
 import os
+import re
 import xml.etree.ElementTree
 
 DEFAULT_XML = "results.xml"
 DEFAULT_IGNORE_FAILS = True
+PROFILE_PREFIX = "profile"
 
 logger = logging.getLogger("FailureFinder")
 logger.setLevel(logging.WARNING)
@@ -28,6 +34,9 @@ def create_argparser():
         default=DEFAULT_IGNORE_FAILS, action="store_false", \
         help="Return exit code 1 on the first simulation failure")
 
+    parser.add_argument("--profile", action="store_true", \
+        help="Print the profiling results of each test")
+
     return parser
 
 def find_failures(xml_file:str, ignore_fails=False):
@@ -50,10 +59,46 @@ def find_failures(xml_file:str, ignore_fails=False):
         logger.info("No failures detected")
     exit(0)
 
+def read_profiles(xml_file:str):
+    """ Collect the profiling properties of xml_file as {test: {metric: value}}. """
+    tree = xml.etree.ElementTree.parse(xml_file)
+    profiles = collections.OrderedDict()
+    for prop in tree.getroot().iter("property"):
+        parts = prop.attrib.get("name", "").split(":", 2)
+        if len(parts) != 3 or parts[0] != PROFILE_PREFIX:
+            continue
+        _, test_name, metric = parts
+        profiles.setdefault(test_name, collections.OrderedDict())[metric] = prop.attrib.get("value", "")
+    return profiles
+
+def print_profiles(xml_file:str):
+    """ Print the profiling results found in xml_file. """
+    profiles = read_profiles(xml_file)
+    if not profiles:
+        print("No profiling results in %s (run with PROFILE=1)" % (xml_file))
+        return
+    print("Profile of %s" % (xml_file))
+    for test_name, metrics in profiles.items():
+        print("  %s: %s sim ns/s (%s ns in %s s), %s trigger awaits" % (test_name, \
+            metrics.get("sim_ns_per_s"), metrics.get("sim_ns"), metrics.get("wall_s"), \
+            metrics.get("awaits_total")))
+        for metric, value in metrics.items():
+            m = re.match(r"awaits\[(.*)\]$", metric)
+            if m:
+                print("    %10s  %s" % (value, m.group(1)))
+        if "cprofile_file" in metrics:
+            print("    cProfile stats: %s" % (metrics["cprofile_file"]))
+        for metric, value in metrics.items():
+            m = re.match(r"cprofile\[(.*)\]$", metric)
+            if m:
+                print("    %20s  %s" % (value, m.group(1)))
+
 def main():
     """ Parse sys.argv and find failures. """
     parser = create_argparser()
     args = parser.parse_args()
+    if args.profile:
+        print_profiles(os.path.abspath(args.xml_file))
     find_failures(os.path.abspath(args.xml_file), ignore_fails=args.ignore_fails)
 
 if __name__ == "__main__":
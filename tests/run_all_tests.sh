@@ -5,9 +5,20 @@ set -e
 SIM_DIRS="../sim/*/"
 IGNORE_FAILS=""		# Empty to pass nothing to find_failures.py
 PRINT_HELP=0
+MAKE_ARGS=""
+SIMULATORS="ghdl"
+ALL_SIMULATORS="ghdl nvc"
+PROFILE_REPORT=""	# Empty to not print the profile report
+SKIP_SWEPT=0		# 1 to leave the tbs with a test_*.py to pytest
+TIMES_FILE="$(mktemp)"	# "<simulator> <sim dir> <seconds>" per run
+trap 'rm -f "$TIMES_FILE"' EXIT
 
 IGN_FAIL_ARG="--ignore-fails"
 FAST_FAIL_ARG="--fast-fail"
+WAVES_ARG="--waves"
+SIM_ARG="--sim"
+PROFILE_ARG="--profile"
+SKIP_SWEPT_ARG="--skip-swept"
 
 for i in "$@"; do
   case $i in
@@ -23,6 +34,25 @@ for i in "$@"; do
       IGNORE_FAILS=$FAST_FAIL_ARG
       shift
       ;;
+    "$WAVES_ARG")
+      MAKE_ARGS="$MAKE_ARGS WAVES=1"
+      shift
+      ;;
+    "$PROFILE_ARG")
+      MAKE_ARGS="$MAKE_ARGS PROFILE=1"
+      PROFILE_REPORT=$PROFILE_ARG
+      shift
+      ;;
+    "$SKIP_SWEPT_ARG")
+      SKIP_SWEPT=1
+      shift
+      ;;
+    "$SIM_ARG="*)
+      SIMULATORS="${i#*=}"
+      SIMULATORS="${SIMULATORS//,/ }"
+      [ "$SIMULATORS" == "all" ] && SIMULATORS=$ALL_SIMULATORS
+      shift
+      ;;
     -*|--*)
       echo "Unknown option $i. Add -h for help info."
       exit 1
@@ -41,17 +71,41 @@ if [ $PRINT_HELP -eq 1 ]; then
   echo "$IGN_FAIL_ARG	To not end this script on the first sim failure."
   echo "$FAST_FAIL_ARG	To end the script on the first sim fail."
   echo "		  This is required to return a non-zero exit code."
+  echo "$WAVES_ARG		To dump full waveforms for every sim (off by default)."
+  echo "$PROFILE_ARG	To profile every test and print sim time per wall clock"
+  echo "		  second and the coroutines awaiting the most triggers."
+  echo "$SIM_ARG=<sim>	Simulator(s) to run with: ghdl (default), nvc, a comma"
+  echo "		  separated list or all. Wall clock times per simulator"
+  echo "		  are printed at the end."
+  echo "$SKIP_SWEPT_ARG	To skip the testbenches with a test_*.py, for when"
+  echo "		  pytest runs their generic sweeps (which include the"
+  echo "		  default configuration) anyway."
   exit 0
 fi
 
 echo "On failure...	 ${IGNORE_FAILS}"
 
-for d in $SIM_DIRS; do		# Parenthesis - Run in subshell so cd resets each loop
-  (
-  [ -L "${d%/}" ] && continue	# Ignore symlinks
-  cd $d
-  make
-  python3 ../../tests/find_failures.py results.xml $IGNORE_FAILS
-  )
+echo "Simulators...	 ${SIMULATORS}"
+
+for s in $SIMULATORS; do
+  for d in $SIM_DIRS; do
+    [ -L "${d%/}" ] && continue	# Ignore symlinks
+    [ -f "${d}Makefile" ] || continue	# Ignore shared helper dirs
+    if [ $SKIP_SWEPT -eq 1 ] && ls ${d}test_*.py > /dev/null 2>&1; then
+      continue			# Run by pytest
+    fi
+    (				# Parenthesis - Run in subshell so cd resets each loop
+    cd $d
+    start=$(date +%s.%N)
+    make SIM=$s $MAKE_ARGS
+    end=$(date +%s.%N)
+    echo "$s $(basename $d) $(awk "BEGIN {print $end - $start}")" >> "$TIMES_FILE"
+    python3 ../../tests/find_failures.py results.xml $IGNORE_FAILS $PROFILE_REPORT
+    )
+  done
 done
 
+# Wall clock summary
+echo
+awk '{ printf "%-6s %-24s %8.1fs\n", $1, $2, $3; total[$1] += $3 }
+     END { for (s in total) printf "%-6s %-24s %8.1fs\n", s, "TOTAL", total[s] }' "$TIMES_FILE"